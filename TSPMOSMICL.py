@@ -5,6 +5,9 @@ import numpy as np
 import cv2
 from gpiozero import AngularServo, DistanceSensor, OutputDevice
 from math import sin, pi
+from color_engine import get_dominant_color, classify_color
+from capture import VISION_ROI, wait_for_convergence
+from preview_server import PreviewServer
 
 
 pwm_pins = [2, 3, 17, 27, 10, 9, 0, 5, 6, 13, 19, 26]
@@ -109,46 +112,23 @@ def dance_code_twist(duration):
 
 
 
-def get_dominant_color(image, k=1):
-    pixels = image.reshape(-1, 3).astype(np.float32)
-    criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 200, 0.1)
-    _, _, centers = cv2.kmeans(pixels, k, None, criteria, 10, cv2.KMEANS_RANDOM_CENTERS)
-    return centers[0].astype(int)[::-1]  # BGR → RGB
-
-def classify_color(rgb):
-    if len(rgb) < 3:  # Handle empty/incorrect color data
-        return "None"
-    
-    r, g, b = rgb[:3]  # Take first 3 elements only
-    hsv = cv2.cvtColor(np.uint8([[rgb]]), cv2.COLOR_RGB2HSV)[0][0]
-    hue, sat, val = hsv
-    
-    if sat < 50 or val < 50:
-        return "None"
-    
-    if (hue < 10 or hue > 170) and sat > 100:
-        return "Red"
-    elif 20 < hue < 35 and sat > 80:
-        return "Yellow"
-    elif 35 < hue < 85 and sat > 60:
-        return "Green"
-    elif 85 < hue < 130 and sat > 80:
-        return "Blue"
-    return "None"
-
 def main():
     picam2 = None  # Initialize variable outside try block
+    preview = None
     initialize_pins()
     initialize_servos()
     try:
+        preview = PreviewServer()  # Annotated frames in a browser on port 8080, no display needed
+        preview.start()
+
         # Initialize the camera
         picam2 = Picamera2()
         config = picam2.create_preview_configuration(main={"size": (640, 480)})
         picam2.configure(config)
         picam2.start()
         
-        # Allow camera to warm up
-        time.sleep(2)
+        # Allow camera to warm up (AE/AWB settle)
+        wait_for_convergence(picam2)
         
         start_time = time.time()
         
@@ -166,15 +146,14 @@ def main():
                     image = cv2.cvtColor(image, cv2.COLOR_RGB2BGR)
                     
                     # Process frame
-                    roi = image[100:400, 200:500]
+                    x, y, w, h = VISION_ROI
+                    roi = image[y:y + h, x:x + w]
                     if roi.size > 0:  # Check if ROI is valid
                         dominant_color = get_dominant_color(roi)
                         color_name = classify_color(dominant_color)
 
                         # Display the frame
-                        cv2.putText(image, f"Color: {color_name}", (20, 50), 
-                                   cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
-                        cv2.imshow("RPi Camera Color Detection", image)
+                        preview.publish(image, color_name, VISION_ROI, color_order='bgr')
                         if color_name == "Green":
                             dance_code_twist(5)
                             time.sleep(0.1)
@@ -184,10 +163,6 @@ def main():
             except Exception as frame_error:
                 print(f"Frame processing error: {frame_error}")
                 continue
-            
-            # Break if 'q' is pressed
-            if cv2.waitKey(1) & 0xFF == ord('q'):
-                break
 
     except Exception as e:
         print(f"Camera initialization error: {e}")
@@ -195,7 +170,8 @@ def main():
         print("Stopping camera...")
         if picam2 is not None:
             picam2.stop()
-        cv2.destroyAllWindows()
+        if preview is not None:
+            preview.stop()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,172 @@
+import os
+import sys
+import time
+import argparse
+import cv2
+import numpy as np
+from color_engine import COLOR_LABELS
+from color_lut import load_color_lut
+from recorder import ReplaySource, timestamps_path, read_metadata
+from offline_vision import make_classifiers, RecordingROIs
+
+# Benchmark every color classifier on recorded ROI frames, no camera needed.
+#
+# Frames can come from:
+#   - a directory with one sub-directory per expected label (Red/, Green/, None/...)
+#     holding image files, e.g. frames/Red/0001.png
+#   - a .npy file of N x H x W x 3 BGR frames (memory-mapped, not loaded), with
+#     the expected labels one per line in <file>.labels.txt if there is one.
+#     Recordings made with recorder.py work too: unused slots are skipped,
+#     RGBX/YUV frames are converted to BGR and full preview frames are cropped
+#     to VISION_ROI as the game loop does.
+#   - --synthetic N, generated noisy frames of each color
+#
+# Usage: python3 bench_vision.py frames/ [--repeat 3] [--only lut histogram]
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp')
+
+# BGR colors used for --synthetic frames
+SYNTHETIC_COLORS = {
+    "Red": (20, 20, 220),
+    "Yellow": (20, 210, 220),
+    "Green": (40, 170, 30),
+    "Blue": (200, 60, 20),
+    "None": (128, 128, 128),
+}
+
+
+def load_frame_dir(path):
+    """Load labelled frames from per-label sub-directories, returns (frames, labels)"""
+    frames, labels = [], []
+    for label in sorted(os.listdir(path)):
+        label_dir = os.path.join(path, label)
+        if not os.path.isdir(label_dir):
+            continue
+        for name in sorted(os.listdir(label_dir)):
+            if not name.lower().endswith(IMAGE_EXTENSIONS):
+                continue
+            frame = cv2.imread(os.path.join(label_dir, name))
+            if frame is not None:
+                frames.append(frame)
+                labels.append(label)
+    return frames, labels
+
+
+def load_frame_file(path):
+    """Memory-map a .npy frame stack, returns (frames, labels or None)"""
+    if os.path.exists(timestamps_path(path)):
+        replay = ReplaySource(path, pacing='fast')
+        frames = replay.frames[:len(replay)]
+    else:
+        frames = np.load(path, mmap_mode='r')
+    metadata = read_metadata(path)
+    if metadata:
+        frames = RecordingROIs(frames, metadata["color_order"], metadata["frame_size"])
+    labels = None
+    labels_path = os.path.splitext(path)[0] + ".labels.txt"
+    if os.path.exists(labels_path):
+        with open(labels_path) as f:
+            labels = [line.strip() for line in f if line.strip()]
+        if len(labels) != len(frames):
+            print(f"Warning: {len(labels)} labels for {len(frames)} frames, ignoring labels")
+            labels = None
+    return frames, labels
+
+
+def synthetic_frames(count, size=300, seed=0):
+    """Noisy solid-color frames cycling through SYNTHETIC_COLORS"""
+    rng = np.random.default_rng(seed)
+    names = list(SYNTHETIC_COLORS)
+    frames, labels = [], []
+    for i in range(count):
+        label = names[i % len(names)]
+        noise = rng.normal(0, 10, (size, size, 3))
+        frames.append(np.clip(np.array(SYNTHETIC_COLORS[label]) + noise, 0, 255).astype(np.uint8))
+        labels.append(label)
+    return frames, labels
+
+
+def run_benchmark(frames, labels, classifiers, repeat=1):
+    """Time each classifier over all frames, returns a list of result dicts
+
+    Frames are read and prepared one at a time, so a memory-mapped
+    recording is never loaded as a whole.
+    """
+    results = []
+    for name, (prepare, classify) in classifiers.items():
+        classify(prepare(np.ascontiguousarray(frames[0])))  # Warm-up (lazy table loads etc.)
+        times = np.empty(len(frames) * repeat)
+        predictions = []
+        for r in range(repeat):
+            for i, frame in enumerate(frames):
+                item = prepare(np.ascontiguousarray(frame))
+                start = time.perf_counter()
+                predicted = classify(item)
+                times[r * len(frames) + i] = time.perf_counter() - start
+                if r == 0:
+                    predictions.append(predicted[0])
+        accuracy = None
+        if labels is not None:
+            accuracy = float(np.mean([p == l for p, l in zip(predictions, labels)]))
+        p50, p95, p99 = np.percentile(times, [50, 95, 99]) * 1000
+        results.append({
+            'name': name,
+            'p50_ms': p50,
+            'p95_ms': p95,
+            'p99_ms': p99,
+            'fps': len(times) / times.sum(),
+            'accuracy': accuracy,
+        })
+    return results
+
+
+def print_results(results):
+    """Print results as a side-by-side table"""
+    print(f"{'classifier':<12} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'frames/s':>10} {'accuracy':>9}")
+    for r in results:
+        accuracy = "-" if r['accuracy'] is None else f"{r['accuracy'] * 100:.1f}%"
+        print(f"{r['name']:<12} {r['p50_ms']:>8.3f} {r['p95_ms']:>8.3f} {r['p99_ms']:>8.3f} "
+              f"{r['fps']:>10.1f} {accuracy:>9}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark color classifiers on recorded frames")
+    parser.add_argument("source", nargs="?", help="frame directory or .npy frame file")
+    parser.add_argument("--synthetic", type=int, default=0, metavar="N",
+                        help="use N generated frames instead of a source")
+    parser.add_argument("--repeat", type=int, default=1, help="passes over the frames")
+    parser.add_argument("--only", nargs="+", metavar="NAME", help="only run these classifiers")
+    args = parser.parse_args(argv)
+
+    if args.synthetic:
+        frames, labels = synthetic_frames(args.synthetic)
+    elif args.source and os.path.isdir(args.source):
+        frames, labels = load_frame_dir(args.source)
+    elif args.source:
+        frames, labels = load_frame_file(args.source)
+    else:
+        parser.error("give a frame source or --synthetic N")
+    if len(frames) == 0:
+        print("No frames found")
+        return 1
+    if labels is not None:
+        unknown = sorted(set(labels) - set(COLOR_LABELS))
+        if unknown:
+            print(f"Warning: labels {unknown} are not classifier outputs and will always miss")
+
+    classifiers = make_classifiers()
+    if args.only:
+        unknown = sorted(set(args.only) - set(classifiers))
+        if unknown:
+            parser.error(f"unknown classifiers {unknown}, choose from {list(classifiers)}")
+        classifiers = {name: classifiers[name] for name in classifiers if name in args.only}
+    load_color_lut()
+    load_color_lut(space="yuv")
+
+    print(f"{len(frames)} frames x {args.repeat} pass(es)")
+    print_results(run_benchmark(frames, labels, classifiers, args.repeat))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
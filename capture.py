@@ -0,0 +1,258 @@
+import time
+import threading
+import numpy as np
+
+# Camera capture on its own thread. Only the newest frame is kept (older ones
+# are dropped), so the game loop always looks at what the camera sees right
+# now instead of whatever was captured before the last gait cycle.
+
+# The ROI the scripts have always sliced out of the 640x480 preview frame
+# (image[100:400, 200:500]) as x, y, width, height.
+PREVIEW_SIZE = (640, 480)
+VISION_ROI = (200, 100, 300, 300)
+LORES_SIZE = (128, 128)
+GRID_LORES_SIZE = (160, 120)  # Full field of view for grid mode, keeps the 4:3 aspect
+GAME_MIN_FPS = 90  # The "game" profile picks the smallest sensor mode at least this fast
+
+# Warm-up: AE/AWB count as settled once these metadata values change by less
+# than WARMUP_TOLERANCE (relative) for WARMUP_STABLE_FRAMES frames in a row.
+WARMUP_KEYS = ("ExposureTime", "AnalogueGain", "ColourGains", "Lux")
+WARMUP_TOLERANCE = 0.03
+WARMUP_STABLE_FRAMES = 4
+WARMUP_TIMEOUT = 3.0
+
+
+def roi_to_scaler_crop(full_crop, roi=VISION_ROI, frame_size=PREVIEW_SIZE):
+    """Map an ROI given in preview frame pixels onto a ScalerCrop rectangle in sensor pixels"""
+    crop_x, crop_y, crop_w, crop_h = full_crop
+    frame_w, frame_h = frame_size
+    x, y, w, h = roi
+    return (crop_x + x * crop_w // frame_w,
+            crop_y + y * crop_h // frame_h,
+            w * crop_w // frame_w,
+            h * crop_h // frame_h)
+
+
+def pick_fast_sensor_mode(sensor_modes, min_fps=GAME_MIN_FPS):
+    """Smallest sensor mode running at min_fps or more (the fastest mode if none is)"""
+    fast = [mode for mode in sensor_modes if mode["fps"] >= min_fps]
+    if not fast:
+        return max(sensor_modes, key=lambda mode: mode["fps"])
+    return min(fast, key=lambda mode: (mode["size"][0] * mode["size"][1], -mode["fps"]))
+
+
+def configure_vision_camera(picam2, roi=VISION_ROI, lores_size=LORES_SIZE, fast=False):
+    """Configure the camera for the vision path, returns the stream name to capture
+
+    Asks for a small YUV420 lores stream and sets ScalerCrop to the ROI, so the
+    ISP does the cropping, scaling and color conversion instead of the CPU.
+    roi=None keeps the full field of view (grid mode). The main stream is kept
+    tiny since nothing reads it.
+
+    fast=True is the "game" profile: a small sensor mode at GAME_MIN_FPS or
+    more with the frame duration pinned to it. Call lock_exposure() once the
+    camera has settled to stop AE/AWB from drifting the screen's hue.
+    """
+    sensor = {}
+    controls = {}
+    if fast:
+        mode = pick_fast_sensor_mode(picam2.sensor_modes)
+        sensor = {"output_size": mode["size"], "bit_depth": mode["bit_depth"]}
+        frame_us = int(1_000_000 / mode["fps"])
+        controls["FrameDurationLimits"] = (frame_us, frame_us)
+        print(f"Game camera profile: sensor mode {mode['size']} at {mode['fps']:.0f} fps")
+    config = picam2.create_preview_configuration(
+        main={"size": lores_size},
+        lores={"size": lores_size, "format": "YUV420"},
+        sensor=sensor,
+        controls=controls,
+    )
+    picam2.configure(config)
+    if roi is not None:
+        full_crop = picam2.camera_controls["ScalerCrop"][2]  # Default crop = full field of view
+        picam2.set_controls({"ScalerCrop": roi_to_scaler_crop(full_crop, roi)})
+    return "lores"
+
+
+def lock_exposure(picam2):
+    """Freeze exposure, gain and white balance at their current (converged) values
+
+    Returns the metadata the values were taken from.
+    """
+    metadata = picam2.capture_metadata()
+    picam2.set_controls({
+        "AeEnable": False,
+        "AwbEnable": False,
+        "ExposureTime": metadata["ExposureTime"],
+        "AnalogueGain": metadata["AnalogueGain"],
+        "ColourGains": metadata["ColourGains"],
+    })
+    return metadata
+
+
+def _metadata_values(metadata):
+    values = []
+    for key in WARMUP_KEYS:
+        value = metadata.get(key)
+        if value is None:
+            continue
+        values.extend(value if isinstance(value, (tuple, list)) else [value])
+    return values
+
+
+def wait_for_convergence(picam2, tolerance=WARMUP_TOLERANCE, stable_frames=WARMUP_STABLE_FRAMES,
+                         timeout=WARMUP_TIMEOUT):
+    """Camera warm-up: return once exposure, gain, colour gains and lux stop changing
+
+    Replaces a fixed time.sleep(2) after picam2.start(). Returns (settled,
+    seconds waited); settled is False if timeout ran out first.
+    """
+    start = time.monotonic()
+    previous = None
+    stable = 0
+    while time.monotonic() - start < timeout:
+        values = _metadata_values(picam2.capture_metadata())
+        if previous is not None and len(values) == len(previous):
+            changes = [abs(v - p) / max(abs(p), 1e-6) for v, p in zip(values, previous)]
+            stable = stable + 1 if max(changes, default=0) <= tolerance else 0
+            if stable >= stable_frames:
+                return True, time.monotonic() - start
+        previous = values
+    return False, time.monotonic() - start
+
+
+def frame_interval(picam2):
+    """Frame interval the camera is actually running at, in seconds"""
+    return picam2.capture_metadata()["FrameDuration"] / 1_000_000
+
+
+def split_yuv420(frame, size=LORES_SIZE):
+    """Split a YUV420 lores array into (y, u, v) plane views without copying
+
+    The array from make_array("lores") is (height * 3 / 2) rows of stride
+    bytes. Stride may be wider than the image, so each plane is cropped.
+    """
+    width, height = size
+    stride = frame.shape[1]
+    flat = frame.reshape(-1)
+    y_end = height * stride
+    chroma_size = (height // 2) * (stride // 2)
+    y = flat[:y_end].reshape(height, stride)[:, :width]
+    u = flat[y_end:y_end + chroma_size].reshape(height // 2, stride // 2)[:, :width // 2]
+    v = flat[y_end + chroma_size:y_end + 2 * chroma_size].reshape(height // 2, stride // 2)[:, :width // 2]
+    return y, u, v
+
+
+class CameraCapture:
+    """Background capture loop for a configured Picamera2 with a latest-frame slot
+
+    With buffers=3 (the default) frames are copied straight out of the camera
+    buffer into three preallocated arrays instead of a new array per frame.
+    A frame from latest() or wait_for_frame() then stays valid until the next
+    call to either; copy it if you need it longer. buffers=0 allocates a new
+    array per frame (make_array) that callers may keep.
+
+    Callbacks in listeners are called as listener(frame, timestamp) on the
+    capture thread for every frame, before it is published; they must be
+    quick and must not keep the frame.
+    """
+
+    def __init__(self, picam2, stream="main", buffers=3):
+        if 0 < buffers < 3:
+            raise ValueError("CameraCapture needs 0 or at least 3 buffers")
+        self.picam2 = picam2
+        self.stream = stream
+        self._lock = threading.Lock()
+        self._frame = None
+        self._timestamp = None
+        self._frame_id = 0
+        self.interval = None  # Running average of the time between frames, in seconds
+        self.listeners = []
+        self._new_frame = threading.Condition(self._lock)
+        self._running = threading.Event()
+        self._thread = None
+        self._buffer_count = buffers
+        self._buffers = []
+        self._latest_slot = -1   # Buffer holding the newest frame
+        self._reading_slot = -1  # Buffer last handed out to the caller
+
+    def start(self):
+        """Start the capture thread (the camera must already be started)"""
+        if self._thread is not None:
+            return
+        self._running.set()
+        self._thread = threading.Thread(target=self._run, name="camera-capture", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the capture thread"""
+        self._running.clear()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+
+    def _run(self):
+        if self._buffer_count:
+            from picamera2 import MappedArray
+        while self._running.is_set():
+            try:
+                request = self.picam2.capture_request()
+            except Exception as e:
+                print(f"Camera capture error: {e}")
+                time.sleep(0.1)
+                continue
+            slot = -1
+            try:
+                if self._buffer_count:
+                    with MappedArray(request, self.stream) as mapped:
+                        slot = self._free_slot(mapped.array)
+                        np.copyto(self._buffers[slot], mapped.array)
+                    frame = self._buffers[slot]
+                else:
+                    frame = request.make_array(self.stream)
+                metadata = request.get_metadata()
+            finally:
+                request.release()
+            timestamp = metadata.get("SensorTimestamp", time.monotonic_ns())
+            for listener in self.listeners:
+                listener(frame, timestamp)
+            self._publish(frame, timestamp, slot)
+
+    def _free_slot(self, source):
+        """Buffer that is neither the newest frame nor the one the caller holds"""
+        if not self._buffers or self._buffers[0].shape != source.shape:
+            with self._lock:
+                self._buffers = [np.empty_like(source) for _ in range(self._buffer_count)]
+                self._latest_slot = self._reading_slot = -1
+                self._frame = None
+        with self._lock:
+            busy = (self._latest_slot, self._reading_slot)
+        return next(i for i in range(self._buffer_count) if i not in busy)
+
+    def _publish(self, frame, timestamp, slot=-1):
+        if self._timestamp is not None and timestamp > self._timestamp:
+            delta = (timestamp - self._timestamp) / 1e9
+            self.interval = delta if self.interval is None else 0.9 * self.interval + 0.1 * delta
+        with self._lock:
+            self._frame = frame
+            self._latest_slot = slot
+            self._timestamp = timestamp
+            self._frame_id += 1
+            self._new_frame.notify_all()
+
+    def latest(self):
+        """Newest frame without waiting, returns (frame, sensor timestamp in ns, frame id)
+
+        frame is None until the first capture arrives. The frame id goes up by
+        one per captured frame, so callers can tell if they've seen it already.
+        """
+        with self._lock:
+            self._reading_slot = self._latest_slot
+            return self._frame, self._timestamp, self._frame_id
+
+    def wait_for_frame(self, after_id=0, timeout=1.0):
+        """Block until a frame newer than after_id arrives (or timeout), then return latest()"""
+        with self._lock:
+            self._new_frame.wait_for(lambda: self._frame_id > after_id, timeout)
+            self._reading_slot = self._latest_slot
+            return self._frame, self._timestamp, self._frame_id
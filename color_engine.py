@@ -0,0 +1,109 @@
+import cv2
+import numpy as np
+
+# Dominant color engines. Every engine takes a BGR image (the ROI sliced out
+# of the camera frame) and returns the dominant color as an RGB int array,
+# which is what classify_color expects.
+
+HISTOGRAM_BITS = 5  # Bits kept per channel -> 32x32x32 bins
+
+
+def get_dominant_color_kmeans(image, k=1, pool=None):
+    """Get dominant color with cv2.kmeans (original, slow)"""
+    pixels = image.reshape(-1, 3).astype(np.float32)
+    criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 200, 0.1)
+    _, _, centers = cv2.kmeans(pixels, k, None, criteria, 10, cv2.KMEANS_RANDOM_CENTERS)
+    return centers[0].astype(int)[::-1]  # BGR → RGB
+
+
+def get_dominant_color_mean(image, pool=None):
+    """Get mean color (what kmeans with k=1 converges to, without the iterations)"""
+    b, g, r, _ = cv2.mean(image)
+    return np.array([r, g, b]).astype(int)
+
+
+def get_dominant_color_histogram(image, bits=HISTOGRAM_BITS, step=1, pool=None):
+    """Get dominant color from a quantized color histogram
+
+    Each pixel is reduced to `bits` bits per channel and counted in one
+    calcHist pass. The most common bin wins and the average of the pixels
+    that fell in it is returned, so the result is a real color and not a
+    bin edge. `step` > 1 only looks at every step-th row and column. With a
+    frame_buffers.BufferPool the bin mask is reused between calls.
+    """
+    if step > 1:
+        image = image[::step, ::step]
+    n = 1 << bits
+    mask = pool.get("histogram_mask", image.shape[:2], np.uint8) if pool is not None else None
+    hist = cv2.calcHist([image], [0, 1, 2], None, [n, n, n], [0, 256, 0, 256, 0, 256])
+    shift = 8 - bits
+    low = np.array(np.unravel_index(int(hist.argmax()), hist.shape)) << shift
+    mask = cv2.inRange(image, low, low + (1 << shift) - 1, dst=mask)
+    b, g, r, _ = cv2.mean(image, mask)
+    return np.array([r, g, b]).astype(int)
+
+
+DOMINANT_COLOR_ENGINES = {
+    'kmeans': get_dominant_color_kmeans,
+    'histogram': get_dominant_color_histogram,
+    'mean': get_dominant_color_mean,
+}
+
+_engine = {'name': 'histogram'}
+
+
+def set_dominant_color_engine(name):
+    """Pick the engine used by get_dominant_color"""
+    if name not in DOMINANT_COLOR_ENGINES:
+        raise ValueError(f"Unknown dominant color engine '{name}', "
+                         f"pick one of {list(DOMINANT_COLOR_ENGINES)}")
+    _engine['name'] = name
+
+
+def get_dominant_color_engine():
+    """Name of the engine currently in use"""
+    return _engine['name']
+
+
+def get_dominant_color(image, engine=None, pool=None):
+    """Get dominant color from image using the selected engine
+
+    Falls back to kmeans if the selected engine fails on this frame.
+    """
+    name = engine or _engine['name']
+    try:
+        return DOMINANT_COLOR_ENGINES[name](image, pool=pool)
+    except Exception as e:
+        if name == 'kmeans':
+            raise
+        print(f"Dominant color engine '{name}' failed ({e}), using kmeans")
+        return get_dominant_color_kmeans(image)
+
+
+# Threshold rules shared by classify_color and the lookup table in color_lut.
+# Hue is OpenCV's 0-180 scale; each hue range is exclusive on both ends.
+MIN_SATURATION = 50
+MIN_VALUE = 50
+COLOR_RULES = (
+    ("Red", ((-1, 10), (170, 181)), 100),
+    ("Yellow", ((20, 35),), 80),
+    ("Green", ((35, 85),), 60),
+    ("Blue", ((85, 130),), 80),
+)
+COLOR_LABELS = ("None",) + tuple(name for name, _, _ in COLOR_RULES)
+
+
+def classify_color(rgb):
+    """Classify color from RGB values"""
+    if len(rgb) < 3:
+        return "None"
+
+    hsv = cv2.cvtColor(np.uint8([[rgb[:3]]]), cv2.COLOR_RGB2HSV)[0][0]
+    hue, sat, val = hsv
+
+    if sat < MIN_SATURATION or val < MIN_VALUE:
+        return "None"
+    for name, hue_ranges, min_sat in COLOR_RULES:
+        if sat > min_sat and any(lo < hue < hi for lo, hi in hue_ranges):
+            return name
+    return "None"
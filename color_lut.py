@@ -0,0 +1,155 @@
+import os
+import hashlib
+import cv2
+import numpy as np
+from color_engine import COLOR_RULES, COLOR_LABELS, MIN_SATURATION, MIN_VALUE
+from frame_buffers import BufferPool
+
+# Per-pixel color classifier. The classify_color threshold rules are compiled
+# once into a BGR -> label lookup table (32x32x32 uint8 by default), then every
+# pixel of the ROI is labelled with a single index into that table and the
+# labels are counted as votes. A second table indexed by Y/U/V lets the lores
+# YUV420 camera stream be classified without converting it to BGR first.
+
+LUT_BITS = 5
+LUT_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "color_lut_cache.npz")
+YUV_LUT_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "color_lut_yuv_cache.npz")
+
+_luts = {}
+
+
+def label_hsv(hsv):
+    """Label an array of OpenCV HSV pixels with indices into COLOR_LABELS"""
+    hue = hsv[..., 0].astype(np.int16)
+    sat = hsv[..., 1]
+    val = hsv[..., 2]
+    labels = np.zeros(hsv.shape[:-1], dtype=np.uint8)
+    undecided = (sat >= MIN_SATURATION) & (val >= MIN_VALUE)
+    for index, (_, hue_ranges, min_sat) in enumerate(COLOR_RULES, start=1):
+        in_range = np.zeros_like(undecided)
+        for lo, hi in hue_ranges:
+            in_range |= (hue > lo) & (hue < hi)
+        hit = undecided & in_range & (sat > min_sat)
+        labels[hit] = index
+        undecided &= ~hit
+    return labels
+
+
+def rules_key(bits=LUT_BITS, space="bgr"):
+    """Fingerprint of the rules a table was built from, used to validate the cache"""
+    text = repr((COLOR_RULES, MIN_SATURATION, MIN_VALUE, bits, space))
+    return hashlib.sha1(text.encode()).hexdigest()
+
+
+def build_color_lut(bits=LUT_BITS, space="bgr"):
+    """Compile the color rules into a lookup table
+
+    space "bgr" gives a table indexed [b, g, r] >> (8 - bits), space "yuv"
+    one indexed [y, u, v] >> (8 - bits) for full-range BT.601 YCbCr (sYCC),
+    which is what the camera's lores stream delivers.
+    """
+    n = 1 << bits
+    shift = 8 - bits
+    centers = (np.arange(n, dtype=np.uint16) << shift) + ((1 << shift) >> 1)
+    a, b, c = np.meshgrid(centers, centers, centers, indexing='ij')
+    grid = np.stack([a, b, c], axis=-1).astype(np.uint8).reshape(n * n, n, 3)
+    if space == "yuv":
+        grid = cv2.cvtColor(np.ascontiguousarray(grid[..., [0, 2, 1]]), cv2.COLOR_YCrCb2BGR)
+    elif space != "bgr":
+        raise ValueError(f"Unknown LUT color space '{space}'")
+    hsv = cv2.cvtColor(grid, cv2.COLOR_BGR2HSV)
+    return label_hsv(hsv).reshape(n, n, n)
+
+
+def load_color_lut(bits=LUT_BITS, path=None, space="bgr"):
+    """Get the lookup table, from memory, the disk cache or by building it"""
+    if (space, bits) in _luts:
+        return _luts[(space, bits)]
+
+    if path is None:
+        path = YUV_LUT_CACHE_PATH if space == "yuv" else LUT_CACHE_PATH
+    key = rules_key(bits, space)
+    lut = None
+    if path and os.path.exists(path):
+        try:
+            with np.load(path) as cached:
+                if str(cached["key"]) == key:
+                    lut = cached["lut"]
+        except Exception as e:
+            print(f"Ignoring bad color LUT cache {path}: {e}")
+
+    if lut is None:
+        lut = build_color_lut(bits, space)
+        if path:
+            try:
+                np.savez(path, lut=lut, key=key)
+            except OSError as e:
+                print(f"Could not save color LUT cache {path}: {e}")
+
+    _luts[(space, bits)] = lut
+    return lut
+
+
+def _lookup(a, b, c, lut, bits, pool, prefix):
+    """Label pixels from three uint8 channel arrays, all intermediates live in pool"""
+    shape = a.shape
+    shift = 8 - bits
+    index = pool.get(prefix + "_index", shape, np.intp)  # np.take would copy anything else
+    part = pool.get(prefix + "_part", shape, np.uint8)
+    labels = pool.get(prefix + "_labels", shape, np.uint8)
+    np.right_shift(a, shift, out=part)
+    np.copyto(index, part)
+    for channel in (b, c):
+        np.left_shift(index, bits, out=index)
+        np.right_shift(channel, shift, out=part)
+        np.bitwise_or(index, part, out=index)
+    np.take(lut.ravel(), index, out=labels, mode='clip')
+    return labels
+
+
+def count_labels(labels, pool=None):
+    """Fraction of pixels voting for each entry of COLOR_LABELS (a pooled array, valid until the next call)"""
+    pool = pool or BufferPool()
+    n = len(COLOR_LABELS)
+    counts = pool.get("label_counts", (n, 1), np.float32)
+    cv2.calcHist([labels], [0], None, [n], [0, n], hist=counts)
+    return np.divide(counts[:, 0], max(labels.size, 1), out=pool.get("label_votes", (n,), np.float32))
+
+
+def label_pixels(image, lut=None, bits=LUT_BITS, pool=None):
+    """Label every pixel of a BGR image, returns an HxW array of COLOR_LABELS indices
+
+    With a frame_buffers.BufferPool nothing is allocated per call, and the
+    result is a pool buffer that the next call overwrites.
+    """
+    if lut is None:
+        lut = load_color_lut(bits)
+    return _lookup(image[..., 0], image[..., 1], image[..., 2], lut, bits,
+                   pool or BufferPool(), "bgr")
+
+
+def color_votes(image, lut=None, bits=LUT_BITS, pool=None):
+    """Fraction of pixels voting for each entry of COLOR_LABELS"""
+    return count_labels(label_pixels(image, lut, bits, pool), pool)
+
+
+def classify_roi(image, lut=None, bits=LUT_BITS, pool=None):
+    """Classify a BGR ROI by per-pixel vote, returns (color name, vote fraction)"""
+    votes = color_votes(image, lut, bits, pool)
+    best = int(votes.argmax())
+    return COLOR_LABELS[best], float(votes[best])
+
+
+def label_yuv_planes(y, u, v, lut=None, bits=LUT_BITS, pool=None):
+    """Label YUV420 planes at chroma resolution, returns an array shaped like u"""
+    if lut is None:
+        lut = load_color_lut(bits, space="yuv")
+    y = y[:2 * u.shape[0]:2, :2 * u.shape[1]:2]  # One luma sample per chroma sample
+    return _lookup(y, u, v, lut, bits, pool or BufferPool(), "yuv")
+
+
+def classify_yuv_planes(y, u, v, lut=None, bits=LUT_BITS, pool=None):
+    """Classify YUV420 planes by per-pixel vote, returns (color name, vote fraction)"""
+    votes = count_labels(label_yuv_planes(y, u, v, lut, bits, pool), pool)
+    best = int(votes.argmax())
+    return COLOR_LABELS[best], float(votes[best])
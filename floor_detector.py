@@ -0,0 +1,113 @@
+from collections import namedtuple
+import cv2
+import numpy as np
+from capture import split_yuv420
+
+# Camera floor check next to the ultrasonic sensor. The bottom band of the
+# frame (the floor right in front of the spider) is shrunk to a few thousand
+# pixels and compared with a floor model learned while the way was clear:
+# a hue/saturation histogram for the color and the usual gradient strength
+# for the texture. Pixels that don't look like floor (wrong color or much
+# sharper edges) are obstacles. For every column we measure how far up from
+# the bottom the floor stays clear, and average that per third of the frame.
+# The plain lores stream is cropped to the screen and never shows the floor.
+
+FLOOR_BAND = 0.35          # Bottom share of the frame that is looked at
+FLOOR_SIZE = (80, 24)      # Band is shrunk to this (width, height) first
+FLOOR_HIST_BINS = (30, 32)  # Hue, saturation bins of the floor model
+FLOOR_MATCH = 24           # Back projection (0..255) below this is not floor
+FLOOR_EDGE_FACTOR = 3.0    # Gradient this many times the floor's usual one is an edge
+FLOOR_LEARN_RATE = 0.05    # How fast the model follows floor that is clearly free
+MIN_FREE = 0.4             # Free space below this counts as blocked
+
+# Each side is 0 (blocked right at the bottom of the frame) .. 1 (clear to the top of the band)
+FreeSpace = namedtuple("FreeSpace", "left centre right")
+
+
+def clearest_side(free_space):
+    """'left' or 'right', whichever has more free floor"""
+    return 'left' if free_space.left >= free_space.right else 'right'
+
+
+class FloorDetector:
+    """Learned floor model for the bottom band of the camera frame
+
+    Call learn() on a frame where the floor in front is clear, then
+    free_space() on every new frame. color_order is 'rgb', 'bgr' or
+    'yuv420' (give lores_size then). mask holds the last obstacle mask
+    (band size, 255 = obstacle).
+    """
+
+    def __init__(self, color_order='rgb', lores_size=None, band=FLOOR_BAND, size=FLOOR_SIZE,
+                 match=FLOOR_MATCH, edge_factor=FLOOR_EDGE_FACTOR, learn_rate=FLOOR_LEARN_RATE):
+        self.color_order = color_order
+        self.lores_size = lores_size
+        self.band = band
+        self.size = size
+        self.match = match
+        self.edge_factor = edge_factor
+        self.learn_rate = learn_rate
+        self.hist = None         # Floor hue/saturation histogram, scaled to 0..255
+        self.edge_level = None   # Usual gradient strength of the floor
+        self.mask = None
+        self._kernel = np.ones((3, 3), np.uint8)
+
+    def _band_hsv(self, image):
+        """Bottom band of a frame, shrunk and converted to HSV"""
+        if self.color_order == 'yuv420':
+            y, u, v = split_yuv420(image, self.lores_size)
+            top = int(u.shape[0] * (1 - self.band))
+            ycrcb = cv2.merge([np.ascontiguousarray(y[2 * top::2, ::2][:u.shape[0] - top, :u.shape[1]]),
+                               v[top:], u[top:]])
+            bgr = cv2.cvtColor(ycrcb, cv2.COLOR_YCrCb2BGR)
+        else:
+            top = int(image.shape[0] * (1 - self.band))
+            bgr = image[top:]
+        small = cv2.resize(bgr, self.size, interpolation=cv2.INTER_AREA)
+        code = cv2.COLOR_RGB2HSV if self.color_order == 'rgb' else cv2.COLOR_BGR2HSV
+        return cv2.cvtColor(small, code)
+
+    def _edges(self, hsv):
+        value = hsv[:, :, 2]
+        gx = cv2.Sobel(value, cv2.CV_16S, 1, 0)
+        gy = cv2.Sobel(value, cv2.CV_16S, 0, 1)
+        return cv2.addWeighted(cv2.convertScaleAbs(gx), 0.5, cv2.convertScaleAbs(gy), 0.5, 0)
+
+    def _histogram(self, hsv, mask=None):
+        hist = cv2.calcHist([hsv], [0, 1], mask, list(FLOOR_HIST_BINS), [0, 180, 0, 256])
+        cv2.GaussianBlur(hist, (3, 3), 0, dst=hist)  # Floor seen in other light is still floor
+        return hist * (255.0 / max(float(hist.max()), 1e-6))
+
+    def learn(self, image):
+        """Take the bottom band of this frame as the floor model"""
+        hsv = self._band_hsv(image)
+        self.hist = self._histogram(hsv)
+        self.edge_level = max(float(np.percentile(self._edges(hsv), 90)), 8.0)
+
+    def free_space(self, image):
+        """FreeSpace for the left, centre and right third of the frame
+
+        Everything counts as free until a floor model has been learned.
+        """
+        if self.hist is None:
+            return FreeSpace(1.0, 1.0, 1.0)
+        hsv = self._band_hsv(image)
+        floor = cv2.calcBackProject([hsv], [0, 1], self.hist, [0, 180, 0, 256], 1)
+        obstacle = (floor < self.match) | (self._edges(hsv) > self.edge_factor * self.edge_level)
+        mask = cv2.morphologyEx(obstacle.view(np.uint8) * 255, cv2.MORPH_OPEN, self._kernel)
+        self.mask = mask
+
+        # Rows of clear floor above the bottom edge, per column
+        height = mask.shape[0]
+        blocked = mask[::-1] > 0
+        free_rows = np.where(blocked.any(axis=0), blocked.argmax(axis=0), height)
+        thirds = np.array_split(free_rows / height, 3)
+        free = FreeSpace(*(float(third.mean()) for third in thirds))
+
+        if self.learn_rate and free.centre >= 1.0:
+            # Floor straight ahead is clear, let the model follow slow light changes
+            clear = np.zeros(mask.shape, np.uint8)
+            clear[:, mask.shape[1] // 3:2 * mask.shape[1] // 3] = 255
+            self.hist *= 1 - self.learn_rate
+            self.hist += self.learn_rate * self._histogram(hsv, clear)
+        return free
@@ -0,0 +1,33 @@
+import numpy as np
+
+# Preallocated scratch arrays for the vision path. Every conversion and
+# intermediate result writes into a named buffer that is allocated once (or
+# again only if the frame size changes), so steady-state frames allocate next
+# to nothing and the Pi doesn't spend time in the allocator or GC.
+
+
+class BufferPool:
+    """Named scratch arrays, reused from frame to frame
+
+    Not thread-safe: give each thread or process that runs vision code its
+    own pool. An array from get() is overwritten the next time the same name
+    is asked for, so don't keep it across frames.
+    """
+
+    def __init__(self):
+        self._buffers = {}
+        self.allocations = 0  # How many arrays were (re)allocated, to check steady state
+
+    def get(self, name, shape, dtype=np.uint8):
+        """Array called name with this shape and dtype, allocated on first use"""
+        shape = tuple(shape)
+        buffer = self._buffers.get(name)
+        if buffer is None or buffer.shape != shape or buffer.dtype != dtype:
+            buffer = np.empty(shape, dtype=dtype)
+            self._buffers[name] = buffer
+            self.allocations += 1
+        return buffer
+
+    def nbytes(self):
+        """Total size of all buffers in bytes"""
+        return sum(buffer.nbytes for buffer in self._buffers.values())
@@ -0,0 +1,221 @@
+import time
+import threading
+from capture import CameraCapture
+from recorder import ReplaySource
+
+# One interface for every place frames come from, so the classifier and game
+# loop are written once. read() returns the newest frame with a
+# CLOCK_MONOTONIC capture timestamp in ns (comparable to time.monotonic_ns(),
+# so frame age/latency can be measured the same way for every source) and a
+# frame id that goes up by one per new frame. Sources with lazy_decode set
+# only decode on demand, so read() there returns the frame decoded after the
+# previous read() and read(wait=True) is the way to get the newest one.
+
+
+class FrameSource:
+    """Base class: start(), read(), stop()
+
+    color_order tells the vision code how to read the frames: 'rgb', 'bgr'
+    or 'yuv420'.
+    """
+
+    color_order = 'rgb'
+    lazy_decode = False  # True: read() can be up to one read() period old, use read(wait=True)
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def read(self, wait=False, timeout=1.0):
+        """Newest frame as (frame, timestamp ns, frame id); frame is None if there is none yet
+
+        wait=True blocks (up to timeout) for a frame that read() hasn't returned before.
+        """
+        raise NotImplementedError
+
+    def add_listener(self, callback):
+        """Call callback(frame, timestamp) for every new frame, not just the ones read()
+
+        It runs on the source's capture thread, so keep it short and copy
+        whatever it needs from the frame.
+        """
+        raise NotImplementedError
+
+    def age(self, timestamp):
+        """Seconds since a frame from this source was captured"""
+        return (time.monotonic_ns() - timestamp) / 1e9 if timestamp is not None else None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class PicameraSource(FrameSource):
+    """Configured and started Picamera2, captured on a background thread
+
+    Timestamps are the libcamera SensorTimestamp, which is CLOCK_MONOTONIC.
+    Frames follow CameraCapture's buffer rules: valid until the next read().
+    """
+
+    def __init__(self, picam2, stream="main", color_order='rgb', buffers=3):
+        self.capture = CameraCapture(picam2, stream, buffers)
+        self.color_order = color_order
+        self._last_id = 0
+
+    def start(self):
+        self.capture.start()
+
+    def stop(self):
+        self.capture.stop()
+
+    def add_listener(self, callback):
+        self.capture.listeners.append(callback)
+
+    def read(self, wait=False, timeout=1.0):
+        if wait:
+            frame, timestamp, frame_id = self.capture.wait_for_frame(self._last_id, timeout)
+        else:
+            frame, timestamp, frame_id = self.capture.latest()
+        self._last_id = frame_id
+        return frame, timestamp, frame_id
+
+
+class WebcamSource(FrameSource):
+    """V4L2 webcam through cv2.VideoCapture with stale frames dropped
+
+    The driver queue is set to one buffer and a background thread keeps
+    calling grab(), which is cheap (no decode), so buffered frames never pile
+    up. A grabbed frame is only decoded with retrieve() once the previous
+    one has been read, and is stamped with the time it was grabbed.
+    read(wait=True) waits for a frame grabbed after the call (fresh, costs
+    up to one frame interval). read() returns the decoded frame at once, but
+    that is the first one grabbed after the previous read(): called at loop
+    rate it lags by about one loop period, so a game loop should wait.
+    """
+
+    color_order = 'bgr'
+    lazy_decode = True
+
+    def __init__(self, device=0, size=None):
+        self.device = device
+        self.size = size
+        self._cap = None
+        self._lock = threading.Lock()
+        self._new_frame = threading.Condition(self._lock)
+        self._frame = None
+        self._timestamp = None
+        self._frame_id = 0
+        self._last_id = 0
+        self._wanted = True  # The last decoded frame has been read, decode the next one
+        self._running = threading.Event()
+        self._thread = None
+        self._listeners = []
+
+    def add_listener(self, callback):
+        self._listeners.append(callback)  # Every grabbed frame gets decoded from now on
+
+    def _open(self):
+        import cv2
+
+        if self._cap is None:
+            self._cap = cv2.VideoCapture(self.device)
+            self._cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+            if self.size is not None:
+                self._cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.size[0])
+                self._cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.size[1])
+
+    def probe(self):
+        """Open the webcam and read one frame on this thread, without starting the grab thread
+
+        For callers that need the frame shape before any threads run (e.g.
+        to fork a VisionWorker). Returns None if no frame could be read.
+        """
+        self._open()
+        ok, frame = self._cap.read()
+        return frame if ok else None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._open()
+        self._running.set()
+        self._thread = threading.Thread(target=self._run, name="webcam-grab", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running.clear()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+        if self._cap is not None:
+            self._cap.release()
+            self._cap = None
+
+    def _run(self):
+        while self._running.is_set():
+            if not self._cap.grab():
+                time.sleep(0.05)
+                continue
+            timestamp = time.monotonic_ns()
+            with self._lock:
+                wanted = self._wanted or bool(self._listeners)
+            if not wanted:
+                continue  # Nobody has read the last frame yet, drop this one undecoded
+            ok, frame = self._cap.retrieve()
+            if not ok:
+                continue
+            for listener in self._listeners:
+                listener(frame, timestamp)
+            with self._lock:
+                self._frame = frame
+                self._timestamp = timestamp
+                self._frame_id += 1
+                self._wanted = False
+                self._new_frame.notify_all()
+
+    def read(self, wait=False, timeout=1.0):
+        with self._lock:
+            if wait:
+                since = time.monotonic_ns()
+                self._wanted = True
+                self._new_frame.wait_for(
+                    lambda: self._timestamp is not None and self._timestamp >= since, timeout)
+            self._wanted = True
+            self._last_id = self._frame_id
+            return self._frame, self._timestamp, self._frame_id
+
+
+class ReplayFrameSource(FrameSource):
+    """Recorded frames (recorder.py) played back as a frame source
+
+    Timestamps are the recorded capture times shifted onto the current
+    monotonic clock, so frame ages look like they did live. read() returns
+    None once the recording is over (unless loop is set).
+    """
+
+    def __init__(self, path, pacing='realtime', loop=False, color_order=None):
+        self.replay = ReplaySource(path, pacing, loop)
+        self.color_order = color_order or self.replay.color_order or 'rgb'  # Old recordings have no metadata
+        self._frame_id = 0
+        self._offset = None
+        self._listeners = []
+
+    def add_listener(self, callback):
+        self._listeners.append(callback)  # Frames are only replayed as read() asks for them
+
+    def read(self, wait=False, timeout=1.0):
+        frame = self.replay.capture_array()
+        if frame is None:
+            return None, None, self._frame_id
+        if self._offset is None or self.replay.index == 1:
+            self._offset = time.monotonic_ns() - self.replay.last_timestamp
+        self._frame_id += 1
+        timestamp = self.replay.last_timestamp + self._offset
+        for listener in self._listeners:
+            listener(frame, timestamp)
+        return frame, timestamp, self._frame_id
@@ -0,0 +1,185 @@
+import os
+import sys
+import struct
+import hashlib
+import inspect
+import zipfile
+import argparse
+import numpy as np
+from motion_scheduler import SERVO_COUNT
+
+# Gaits compiled to plain arrays. Every gait in gaits.GAITS becomes a block of
+# keyframe rows (12 angles each) plus how long each row is held. Hold times
+# are stored as fixed + per_speed seconds, so one table covers every speed:
+# hold(speed) = fixed + per_speed * speed. All gaits share one set of arrays
+# in an uncompressed .npz that is memory-mapped at startup, nothing is
+# parsed or copied. Playing a gait is then just streaming rows (MotionScheduler
+# takes a CompiledGait as it is).
+#
+# Library arrays:
+#   version              LIBRARY_VERSION the file was written with
+#   key                  gaits_key() of the gaits it was compiled from
+#   names                gait names
+#   offsets              first row of each gait (plus the end of the last one)
+#   angles               rows x 12 uint8 angles, HOLD_ANGLE = leave the servo alone
+#   fixed, per_speed     rows float32, hold time after each row
+#
+# Usage: python3 gait_library.py [--list]   (rebuilds gait_library.npz from gaits.py)
+
+LIBRARY_VERSION = 1
+GAIT_LIBRARY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "gait_library.npz")
+HOLD_ANGLE = 255
+
+
+def gaits_key(gaits):
+    """Fingerprint of the gait names and the source files their builders live in
+
+    Editing a gait (or anything else in its module, e.g. leg_ik.py's leg
+    dimensions) changes the key, so the library is rebuilt on the next load.
+    """
+    digest = hashlib.sha1(repr((LIBRARY_VERSION, list(gaits))).encode())
+    for path in sorted({inspect.getsourcefile(builder) for builder in gaits.values()}):
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def compile_timeline(builder):
+    """Compile a builder(speed) -> Timeline into (angles, fixed, per_speed) arrays
+
+    The builder is run at speed 1 and 2; hold times must be linear in speed.
+    """
+    timelines = [builder(1.0), builder(2.0)]
+    holds, keyframes = [], []
+    for timeline in timelines:
+        times, angles = timeline.times, timeline.angles
+        if len(times) == 0 or times[0] > 0:
+            # Starts with a wait: hold everything until the first keyframe
+            times = np.concatenate([[0.0], times])
+            angles = np.concatenate([np.full((1, SERVO_COUNT), np.nan, np.float32), angles])
+        holds.append(np.diff(np.append(times, timeline.duration)))
+        keyframes.append(angles)
+    if len(holds[0]) != len(holds[1]) or not np.array_equal(keyframes[0], keyframes[1], equal_nan=True):
+        raise ValueError("Gait has different keyframes at different speeds")
+    per_speed = holds[1] - holds[0]
+    fixed = holds[0] - per_speed
+    angles = keyframes[0]
+    rows = np.where(np.isnan(angles), HOLD_ANGLE, np.clip(np.rint(angles), 0, 180)).astype(np.uint8)
+    return rows, fixed.astype(np.float32), per_speed.astype(np.float32)
+
+
+def build_gait_library(gaits=None, path=GAIT_LIBRARY_PATH):
+    """Compile gaits (name -> builder, default gaits.GAITS) and write the library"""
+    if gaits is None:
+        from gaits import GAITS as gaits
+    names, blocks, offsets = [], [], [0]
+    for name, builder in gaits.items():
+        block = compile_timeline(builder)
+        names.append(name)
+        blocks.append(block)
+        offsets.append(offsets[-1] + len(block[0]))
+    np.savez(path,  # Not compressed, so the arrays can be memory-mapped
+             version=np.array([LIBRARY_VERSION]),
+             key=np.array(gaits_key(gaits)),
+             names=np.array(names),
+             offsets=np.array(offsets, np.int64),
+             angles=np.concatenate([b[0] for b in blocks]),
+             fixed=np.concatenate([b[1] for b in blocks]),
+             per_speed=np.concatenate([b[2] for b in blocks]))
+    return path
+
+
+def _mmap_npz(path):
+    """Memory-map every array in an uncompressed .npz"""
+    arrays = {}
+    with zipfile.ZipFile(path) as archive, open(path, 'rb') as f:
+        for info in archive.infolist():
+            if info.compress_type != zipfile.ZIP_STORED:
+                raise ValueError(f"{path} is compressed and can't be memory-mapped")
+            f.seek(info.header_offset)
+            name_length, extra_length = struct.unpack('<HH', f.read(30)[26:30])
+            f.seek(info.header_offset + 30 + name_length + extra_length)
+            version = np.lib.format.read_magic(f)
+            if version == (1, 0):
+                shape, fortran, dtype = np.lib.format.read_array_header_1_0(f)
+            else:
+                shape, fortran, dtype = np.lib.format.read_array_header_2_0(f)
+            arrays[info.filename[:-4]] = np.memmap(path, dtype=dtype, mode='r', offset=f.tell(),
+                                                   shape=shape, order='F' if fortran else 'C')
+    return arrays
+
+
+class CompiledGait:
+    """One gait at one speed, ready for MotionScheduler (name, times, angles, duration)"""
+
+    def __init__(self, name, angles, holds):
+        self.name = name
+        self.angles = angles
+        self.holds = holds
+        self.times = np.concatenate([[0.0], np.cumsum(holds[:-1])])
+        self.duration = float(holds.sum())
+
+
+class GaitLibrary:
+    """Memory-mapped gait library"""
+
+    def __init__(self, path=GAIT_LIBRARY_PATH):
+        arrays = _mmap_npz(path)
+        if int(arrays["version"][0]) != LIBRARY_VERSION:
+            raise ValueError(f"{path} is version {int(arrays['version'][0])}, expected {LIBRARY_VERSION}")
+        self.path = path
+        self.key = str(arrays["key"][()])
+        self.names = [str(name) for name in arrays["names"]]
+        self._index = {name: i for i, name in enumerate(self.names)}
+        self._offsets = arrays["offsets"]
+        self._angles = arrays["angles"]
+        self._fixed = arrays["fixed"]
+        self._per_speed = arrays["per_speed"]
+
+    def __contains__(self, name):
+        return name in self._index
+
+    def gait(self, name, speed=1.0):
+        """CompiledGait for name at speed (angles as floats, NaN = leave the servo alone)"""
+        i = self._index[name]
+        rows = slice(int(self._offsets[i]), int(self._offsets[i + 1]))
+        raw = self._angles[rows]
+        angles = np.where(raw == HOLD_ANGLE, np.nan, raw).astype(np.float32)
+        holds = self._fixed[rows] + self._per_speed[rows] * np.float32(speed)
+        return CompiledGait(name, angles, holds)
+
+
+def load_gait_library(path=GAIT_LIBRARY_PATH, gaits=None):
+    """Memory-map the gait library, building it first if it is missing or the gaits have changed"""
+    if gaits is None:
+        from gaits import GAITS as gaits
+    key = gaits_key(gaits)
+    try:
+        library = GaitLibrary(path)
+        if library.key == key:
+            return library
+        reason = "gaits changed"
+    except (OSError, ValueError, KeyError, zipfile.BadZipFile) as e:
+        reason = e
+    print(f"Building gait library ({reason})")
+    build_gait_library(gaits, path)
+    return GaitLibrary(path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compile gaits.py into the gait library")
+    parser.add_argument("--path", default=GAIT_LIBRARY_PATH)
+    parser.add_argument("--list", action="store_true", help="only list what is in the library")
+    args = parser.parse_args(argv)
+    if not args.list:
+        build_gait_library(path=args.path)
+    library = GaitLibrary(args.path)
+    print(f"{library.path} (version {LIBRARY_VERSION}, {os.path.getsize(library.path)} bytes)")
+    for name in library.names:
+        gait = library.gait(name)
+        print(f"  {name:<12} {len(gait.angles):>3} keyframes  {gait.duration:.2f}s at speed 1")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,156 @@
+import random
+from motion_scheduler import Timeline
+from leg_ik import ik_tripod_timeline
+
+# The gaits and moves, written once as Timelines. Wait times are at speed 1;
+# the ones that scale with the walking speed are multiplied by it, like
+# time.sleep(0.1 * speed) in the old scripts. gait_library.py compiles
+# everything in GAITS into gait_library.npz for the robot to play.
+
+# Tripod gait leg groups (indices match servo list)
+TRIPOD_1 = [0, 4, 8]    # Leg1, Leg3, Leg5 (side-to-side)
+TRIPOD_1_UP = [1, 5, 9]  # Corresponding up-down servos
+TRIPOD_2 = [2, 6, 10]    # Leg2, Leg4, Leg6
+TRIPOD_2_UP = [3, 7, 11]
+
+SIDE_SERVOS = list(range(0, 12, 2))
+UP_SERVOS = list(range(1, 12, 2))
+ALL_SERVOS = list(range(12))
+
+
+def tripod1_timeline(speed=1.0):
+    """Tripod gait walking, one cycle"""
+    walk = Timeline("walk")
+    # Phase 1: Lift and swing TRIPOD_1
+    walk.set(TRIPOD_1_UP, 90).wait(0.1 * speed)
+    walk.set(TRIPOD_1, 120).wait(0.2 * speed)
+    walk.set(TRIPOD_1_UP, 60).wait(0.1 * speed)
+
+    # Phase 2: Lift and swing TRIPOD_2
+    walk.set(TRIPOD_2_UP, 90).wait(0.1 * speed)
+    walk.set(TRIPOD_2, 60).wait(0.2 * speed)
+    walk.set(TRIPOD_2_UP, 60).wait(0.1 * speed)
+
+    # Phase 3: Push back
+    walk.set(TRIPOD_1, 90).wait(0.2 * speed)
+    walk.set(TRIPOD_2, 90).wait(0.1 * speed)
+    return walk
+
+
+def tripod2_timeline(speed=1.0):
+    """
+    Tripod gait for circular leg arrangement (6 legs in circle starting from front)
+    Leg numbering (view from top):
+        [0] Front
+      5     1
+     4     2
+        [3] Back
+    Servo indices (2 per leg - even:side-to-side, odd:up-down):
+    [0] Leg0-side, [1] Leg0-up
+    [2] Leg1-side, [3] Leg1-up
+    ...
+    [10] Leg5-side, [11] Leg5-up
+    """
+    # Define tripod groups for circular arrangement
+    TRIPOD_A = [0, 2, 4]    # Leg0, Leg1, Leg2 (Front, Front-right, Middle-right)
+    TRIPOD_A_UP = [1, 3, 5]  # Corresponding up-down servos
+    TRIPOD_B = [6, 8, 10]    # Leg3, Leg4, Leg5 (Back, Middle-left, Front-left)
+    TRIPOD_B_UP = [7, 9, 11]
+
+    walk = Timeline("walk")
+    # Phase 1: Lift and swing first tripod
+    walk.set(TRIPOD_A_UP, 80).wait(0.1 * speed)  # Lift legs
+    walk.set(TRIPOD_A, 120).wait(0.2 * speed)    # Swing forward
+
+    # Phase 2: Lower first tripod while lifting second
+    walk.set(TRIPOD_A_UP, 40).wait(0.1 * speed)  # Partial lower for pushing
+    walk.set(TRIPOD_B_UP, 80).wait(0.1 * speed)  # Lift opposite tripod
+
+    # Phase 3: Swing second tripod forward
+    walk.set(TRIPOD_B, 60).wait(0.2 * speed)     # Swing forward opposite side
+
+    # Phase 4: Lower second tripod
+    walk.set(TRIPOD_B_UP, 40).wait(0.1 * speed)  # Partial lower
+
+    # Phase 5: Return to neutral position
+    walk.set(ALL_SERVOS, 90).wait(0.1 * speed)   # Center all servos
+    return walk
+
+
+def avoid_timeline(direction):
+    """Side-step, three times"""
+    avoid = Timeline("avoid")
+    for _ in range(3):
+        if direction == 'left':
+            avoid.set(TRIPOD_1_UP, 90).wait(0.1)
+            avoid.set(TRIPOD_1, 120).wait(0.2)
+            avoid.set(TRIPOD_1_UP, 60).wait(0.1)
+        else:
+            avoid.set(TRIPOD_2_UP, 90).wait(0.1)
+            avoid.set(TRIPOD_2, 60).wait(0.2)
+            avoid.set(TRIPOD_2_UP, 60).wait(0.1)
+        avoid.wait(0.2)
+    return avoid
+
+
+def crawl_timeline(speed=1.0, step_angle=30, lift_angle=90, down_angle=60):
+    """All legs together: plant, lift, reach forward, plant, pull back (crawl.py)"""
+    crawl = Timeline("crawl")
+    crawl.set(UP_SERVOS, down_angle).wait(0.5 * speed)
+    crawl.set(UP_SERVOS, lift_angle).wait(0.3 * speed)
+    crawl.set(SIDE_SERVOS, 90 + step_angle).wait(0.4 * speed)
+    crawl.set(UP_SERVOS, down_angle).wait(0.3 * speed)
+    crawl.set(SIDE_SERVOS, 90 - step_angle).wait(0.4 * speed)
+    crawl.set(SIDE_SERVOS, 90).wait(0.3 * speed)
+    return crawl
+
+
+def twist_timeline():
+    """One twist of dance_code_twist: all legs down, sides swing 150 -> 30"""
+    twist = Timeline("twist")
+    twist.set(SIDE_SERVOS, 150).set(UP_SERVOS, 20).wait(0.5)
+    twist.set(SIDE_SERVOS, 30).set(UP_SERVOS, 20).wait(0.5)
+    return twist
+
+
+def dance_down_timeline():
+    """Rest, legs up and wave once (dance_code_down)"""
+    down = Timeline("dance_down")
+    down.set(ALL_SERVOS, 90).wait(0.5)
+    down.set(UP_SERVOS, 120).set(SIDE_SERVOS, 120).wait(0.5)
+    down.set(SIDE_SERVOS, 20).wait(0.5)
+    return down
+
+
+def die_timeline():
+    """Curl up for three seconds, then back to neutral (sides fall to a random side)"""
+    die = Timeline("die")
+    for i in SIDE_SERVOS:
+        die.set(i, 30 if random.random() > 0.5 else 150)
+    die.set(UP_SERVOS, 150)
+    die.wait(3).set(ALL_SERVOS, 90).wait(1)
+    return die
+
+
+def twitch_timeline(leg):
+    """Flick one leg's up-down servo"""
+    updown_servo = leg * 2 + 1
+    twitch = Timeline("twitch")
+    for angle in (90, 60, 90):
+        twitch.set(updown_servo, angle).wait(0.1)
+    twitch.set(updown_servo, 60)
+    return twitch
+
+
+# Fixed gaits for the library: name -> builder(speed). Builders that ignore
+# speed just don't scale.
+GAITS = {
+    "tripod1": tripod1_timeline,
+    "tripod2": tripod2_timeline,
+    "ik_tripod": ik_tripod_timeline,  # Foot-space tripod walk (leg_ik.py)
+    "avoid_left": lambda speed=1.0: avoid_timeline('left'),
+    "avoid_right": lambda speed=1.0: avoid_timeline('right'),
+    "crawl": crawl_timeline,
+    "twist": lambda speed=1.0: twist_timeline(),
+    "dance_down": lambda speed=1.0: dance_down_timeline(),
+}
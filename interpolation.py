@@ -0,0 +1,87 @@
+import time
+import numpy as np
+
+# Smooth moves for all 12 servos at once. A Timeline (or a compiled gait)
+# says where each servo should be at each keyframe; here every keyframe
+# becomes an eased move from the previous target to the new one, spread over
+# the time until the next keyframe, and the whole gait is sampled at the
+# servo update rate in one go as a samples x 12 array. Every sample moves
+# every leg that is moving, so a tripod swings together instead of one leg
+# after another. Easing curves are precomputed tables, sampling a gait is a
+# handful of array operations.
+#
+# Easing: 'linear', 'sine' (ease in and out), 'sine-out' (the old smooth_move
+# curve, fast start), 'cubic' (smoothstep) and 'minjerk' (minimum-jerk,
+# 10t^3 - 15t^4 + 6t^5: zero velocity and acceleration at both ends).
+
+SERVO_RATE = 50  # Hz, one update per servo PWM frame
+EASING_SAMPLES = 1024
+
+_progress = np.linspace(0.0, 1.0, EASING_SAMPLES + 1)
+EASING_TABLES = {
+    'linear': _progress,
+    'sine': (1 - np.cos(_progress * np.pi)) / 2,
+    'sine-out': np.sin(_progress * np.pi / 2),
+    'cubic': _progress ** 2 * (3 - 2 * _progress),
+    'minjerk': _progress ** 3 * (10 - 15 * _progress + 6 * _progress ** 2),
+}
+
+
+def ease(progress, easing='minjerk'):
+    """Eased progress for an array of 0..1 progress values (table lookup)"""
+    table = EASING_TABLES[easing]
+    index = np.rint(np.clip(progress, 0.0, 1.0) * EASING_SAMPLES).astype(np.intp)
+    return table[index]
+
+
+class Trajectory:
+    """A densely sampled move, playable by MotionScheduler (name, times, angles, duration)"""
+
+    def __init__(self, name, times, angles):
+        self.name = name
+        self.times = times
+        self.angles = angles
+        self.duration = float(times[-1]) if len(times) else 0.0
+
+
+def interpolate(timeline, start=None, easing='minjerk', rate=SERVO_RATE):
+    """Sample a timeline as eased moves for all servos, returns a Trajectory
+
+    start holds the angles the servos are at now (NaN = unknown); a servo
+    with no known start jumps to its first target. NaN targets hold the
+    previous one, a servo that is never set stays NaN (left alone).
+    """
+    times = np.asarray(timeline.times, np.float64)
+    rows = np.asarray(timeline.angles, np.float64)
+    channels = rows.shape[1]
+    start = np.full(channels, np.nan) if start is None else np.asarray(start, np.float64)
+    if len(times) == 0 or times[0] > 0:
+        times = np.concatenate([[0.0], times])
+        rows = np.concatenate([np.full((1, channels), np.nan), rows])
+
+    # Target of every servo after each keyframe: carry the last set angle forward
+    count = len(times)
+    last_set = np.where(np.isnan(rows), -1, np.arange(count)[:, None])
+    np.maximum.accumulate(last_set, axis=0, out=last_set)
+    targets = np.where(last_set >= 0, rows[np.maximum(last_set, 0), np.arange(channels)], start)
+    origins = np.concatenate([start[None], targets[:-1]])
+    origins = np.where(np.isnan(origins), targets, origins)
+
+    ends = np.append(times[1:], timeline.duration)
+    samples = np.append(np.arange(0.0, timeline.duration, 1.0 / rate), timeline.duration)
+    segment = np.searchsorted(times, samples, side='right') - 1
+    span = (ends - times)[segment]
+    progress = np.divide(samples - times[segment], span, out=np.ones_like(samples), where=span > 0)
+    weights = ease(progress, easing)[:, None]
+    angles = origins[segment] + (targets[segment] - origins[segment]) * weights
+    return Trajectory(timeline.name, samples, angles.astype(np.float32))
+
+
+def play_trajectory(trajectory, write):
+    """Play a Trajectory on this thread, write(row) at each sample time"""
+    start = time.monotonic()
+    for due, row in zip(trajectory.times.tolist(), trajectory.angles):
+        delay = start + due - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        write(row)
@@ -0,0 +1,232 @@
+import os
+import sys
+import time
+import argparse
+from collections import deque
+from multiprocessing import Pool
+import cv2
+import numpy as np
+from color_engine import COLOR_LABELS
+from color_lut import load_color_lut
+from recorder import ReplaySource, timestamps_path, read_metadata
+from offline_vision import make_classifiers, default_roi, recording_roi
+
+# Label hours of recorded game footage offline as a starting point for
+# classifier test sets. Frames are streamed from a video file (decoded here,
+# chunk by chunk) or a recorder.py / .npy dump (memory-mapped by the workers
+# themselves, so only frame numbers travel between processes) through every
+# classifier in a process pool. Only a few chunks are in flight at a time, so
+# memory stays flat however long the footage is.
+#
+# The output .npz is columnar, one entry per frame:
+#   frame                 frame number in the source
+#   timestamp             capture time in ns (-1 if unknown)
+#   <classifier>_label    index into labels (COLOR_LABELS)
+#   <classifier>_conf     confidence (vote fraction; 1.0 for dominant-color engines)
+#   <classifier>_ms       time the classifier took on that frame
+#   labels, classifiers   names for the columns above
+#
+# Usage: python3 label_footage.py game.mp4 -o game_labels.npz [--jobs 4] [--every 3]
+
+CHUNK_FRAMES = 64
+IN_FLIGHT_PER_JOB = 2  # Chunks queued per worker before the reader waits
+
+_classifiers = None
+_sources = {}
+
+
+def _init_worker(names):
+    global _classifiers
+    load_color_lut()
+    load_color_lut(space="yuv")
+    classifiers = make_classifiers()
+    _classifiers = {name: classifiers[name] for name in names}
+
+
+def label_chunk(frames, roi=None, color_order='bgr', frame_size=None):
+    """Run every classifier on a chunk, returns (labels, confidences, ms) arrays of chunk x classifiers
+
+    frames is either a list of frames or (path, frame numbers) of a .npy
+    dump, which is then memory-mapped in this process. color_order and
+    frame_size are as in offline_vision.recording_roi.
+    """
+    if isinstance(frames, tuple):
+        path, numbers = frames
+        if path not in _sources:
+            _sources[path] = np.load(path, mmap_mode='r')
+        frames = (_sources[path][i] for i in numbers)
+        count = len(numbers)
+    else:
+        count = len(frames)
+    labels = np.zeros((count, len(_classifiers)), np.uint8)
+    confidences = np.zeros((count, len(_classifiers)), np.float32)
+    ms = np.zeros((count, len(_classifiers)), np.float32)
+    for i, frame in enumerate(frames):
+        prepared = [prepare(recording_roi(frame, color_order, frame_size, roi))
+                    for prepare, _ in _classifiers.values()]
+        for j, (_, classify) in enumerate(_classifiers.values()):
+            start = time.perf_counter()
+            name, confidence = classify(prepared[j])
+            ms[i, j] = (time.perf_counter() - start) * 1000
+            labels[i, j] = COLOR_LABELS.index(name)
+            confidences[i, j] = confidence
+    return labels, confidences, ms
+
+
+def dump_chunks(path, every=1, chunk=CHUNK_FRAMES):
+    """(frame numbers, timestamps, work item) chunks of a .npy dump"""
+    if os.path.exists(timestamps_path(path)):
+        replay = ReplaySource(path, pacing='fast')
+        count, timestamps = len(replay), replay.timestamps
+    else:
+        count, timestamps = len(np.load(path, mmap_mode='r')), None
+    for start in range(0, count, chunk * every):
+        numbers = np.arange(start, min(start + chunk * every, count), every)
+        stamps = timestamps[numbers] if timestamps is not None else np.full(len(numbers), -1)
+        yield numbers, stamps, (path, numbers)
+
+
+def video_chunks(path, every=1, chunk=CHUNK_FRAMES, roi=None):
+    """(frame numbers, timestamps, work item) chunks of a video file, decoded as we go"""
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise OSError(f"Can't open video {path}")
+    number = 0
+    numbers, stamps, frames = [], [], []
+    try:
+        while True:
+            if number % every:
+                if not cap.grab():  # No decode for frames we skip
+                    break
+                number += 1
+                continue
+            ok, frame = cap.read()
+            if not ok:
+                break
+            numbers.append(number)
+            stamps.append(int(cap.get(cv2.CAP_PROP_POS_MSEC) * 1_000_000))
+            frames.append(recording_roi(frame, roi=roi))  # Only the ROI goes to the workers
+            number += 1
+            if len(frames) == chunk:
+                yield np.array(numbers), np.array(stamps), frames
+                numbers, stamps, frames = [], [], []
+        if frames:
+            yield np.array(numbers), np.array(stamps), frames
+    finally:
+        cap.release()
+
+
+def label_footage(source, output, names, jobs=None, every=1, chunk=CHUNK_FRAMES, roi='auto', rgb=False):
+    """Label a video or .npy dump into a columnar .npz, returns the number of frames labelled"""
+    if source.endswith('.npy'):
+        # recorder.py metadata says what the frames hold (YUV420 arrays are taller than the image)
+        metadata = read_metadata(source)
+        shape = np.load(source, mmap_mode='r').shape[1:]
+        color_order = metadata.get("color_order") or ('rgb' if rgb else 'bgr')
+        frame_size = tuple(metadata.get("frame_size", shape[1::-1]))
+        if roi == 'auto':
+            roi = default_roi(frame_size)
+        chunks = dump_chunks(source, every, chunk)
+        worker_args = (roi, color_order, frame_size)
+    else:
+        cap = cv2.VideoCapture(source)
+        frame_size = (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+        cap.release()
+        if roi == 'auto':
+            roi = default_roi(frame_size)
+        chunks = video_chunks(source, every, chunk, roi)
+        worker_args = ()  # Cropped to BGR ROIs while decoding
+
+    columns = {"frame": [], "timestamp": [], "labels": [], "conf": [], "ms": []}
+    start = time.monotonic()
+    done = 0
+    jobs = jobs or os.cpu_count() or 1
+    with Pool(jobs, initializer=_init_worker, initargs=(names,)) as pool:
+        pending = deque()
+        max_pending = IN_FLIGHT_PER_JOB * jobs
+
+        def collect(result):
+            nonlocal done
+            numbers, stamps, job = result
+            labels, conf, ms = job.get()
+            for key, value in zip(("frame", "timestamp", "labels", "conf", "ms"),
+                                  (numbers, stamps, labels, conf, ms)):
+                columns[key].append(value)
+            done += len(numbers)
+            rate = done / max(time.monotonic() - start, 1e-6)
+            print(f"\r{done} frames ({rate:.0f} frames/s)", end="", flush=True)
+
+        for numbers, stamps, work in chunks:
+            pending.append((numbers, stamps, pool.apply_async(label_chunk, (work,) + worker_args)))
+            if len(pending) >= max_pending:
+                collect(pending.popleft())  # Wait for the oldest chunk, keeps memory bounded
+        while pending:
+            collect(pending.popleft())
+    print()
+
+    if done == 0:
+        return 0
+    labels = np.concatenate(columns["labels"])
+    conf = np.concatenate(columns["conf"])
+    ms = np.concatenate(columns["ms"])
+    out = {
+        "frame": np.concatenate(columns["frame"]).astype(np.int64),
+        "timestamp": np.concatenate(columns["timestamp"]).astype(np.int64),
+        "labels": np.array(COLOR_LABELS),
+        "classifiers": np.array(names),
+    }
+    for j, name in enumerate(names):
+        out[f"{name}_label"] = labels[:, j]
+        out[f"{name}_conf"] = conf[:, j]
+        out[f"{name}_ms"] = ms[:, j]
+    np.savez_compressed(output, **out)
+    return done
+
+
+def print_summary(path):
+    """Label counts and median time per classifier from a labels file"""
+    data = np.load(path)
+    labels = list(data["labels"])
+    print(f"{'classifier':<12} {'median ms':>9}  " + " ".join(f"{name:>7}" for name in labels))
+    for name in data["classifiers"]:
+        counts = np.bincount(data[f"{name}_label"], minlength=len(labels))
+        print(f"{name:<12} {np.median(data[f'{name}_ms']):>9.3f}  " + " ".join(f"{c:>7}" for c in counts))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Label recorded game footage with every color classifier")
+    parser.add_argument("source", help="video file or .npy frame dump (recorder.py)")
+    parser.add_argument("-o", "--output", help="output .npz (default: <source>.labels.npz)")
+    parser.add_argument("--jobs", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--every", type=int, default=1, metavar="N", help="only label every N-th frame")
+    parser.add_argument("--chunk", type=int, default=CHUNK_FRAMES, help="frames per work chunk")
+    parser.add_argument("--roi", type=int, nargs=4, metavar=("X", "Y", "W", "H"),
+                        help="part of the frame to classify (default: the game ROI for 640x480 footage)")
+    parser.add_argument("--full-frame", action="store_true", help="classify the whole frame")
+    parser.add_argument("--rgb", action="store_true",
+                        help="frames are RGB or RGBX, not BGR (picamera2 dumps without recorder.py metadata)")
+    parser.add_argument("--only", nargs="+", metavar="NAME", help="only run these classifiers")
+    args = parser.parse_args(argv)
+
+    names = list(make_classifiers())
+    if args.only:
+        unknown = sorted(set(args.only) - set(names))
+        if unknown:
+            parser.error(f"unknown classifiers {unknown}, choose from {names}")
+        names = [name for name in names if name in args.only]
+    roi = None if args.full_frame else (tuple(args.roi) if args.roi else 'auto')
+    output = args.output or os.path.splitext(args.source)[0] + ".labels.npz"
+    load_color_lut()  # Build the tables once here so the workers find them cached on disk
+    load_color_lut(space="yuv")
+
+    count = label_footage(args.source, output, names, args.jobs, args.every, args.chunk, roi, args.rgb)
+    if count == 0:
+        print("No frames found")
+        return 1
+    print(f"Labelled {count} frames into {output}")
+    print_summary(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
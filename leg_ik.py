@@ -0,0 +1,191 @@
+import numpy as np
+from motion_scheduler import Timeline
+
+# Inverse kinematics for the six 2-DOF legs, so gaits can be written as foot
+# positions (stride length, body height, step height in mm) instead of servo
+# angles. Legs sit in a circle, as in tripod2_timeline:
+#
+#         [0] Front
+#       5     1
+#      4       2
+#         [3] Back
+#
+# Body frame: x to the right, y forward, z up, origin in the centre of the
+# body at hip height. Leg i's hip sits BODY_RADIUS out at LEG_ANGLES[i]
+# (clockwise from the front). The side-to-side servo swings the leg around
+# the hip (90 = pointing straight out, more = towards the front on the right
+# side), the up-down servo tilts the femur (90 = level, more = foot higher).
+# A 2-DOF leg can't reach every point: the height fixes the femur tilt, and
+# with it how far out the foot is, the side-to-side servo only picks the
+# direction. solve() aims at the point and reports how far off it lands;
+# feet_timeline refuses keyframes with a foot more than IK_TOLERANCE off.
+#
+# Angles come out as 12-vectors in servo order (even: side-to-side, odd:
+# up-down), ready for Timeline.set / ServoBank.write. IKTable answers the
+# same question from precomputed grids with one index per foot.
+
+BODY_RADIUS = 55.0   # mm, body centre to hip axis
+COXA_LENGTH = 25.0   # mm, hip axis to knee axis
+FEMUR_LENGTH = 55.0  # mm, knee axis to foot tip
+LEG_ANGLES = np.radians(np.arange(6) * 60.0)
+IK_GRID_STEP = 0.5   # mm
+IK_TOLERANCE = 2.0   # mm a foot may miss its target by before it counts as unreachable
+
+STAND_HEIGHT = 40.0  # mm, hips above the ground
+STEP_HEIGHT = 25.0   # mm, foot lift while swinging
+STRIDE = 30.0        # mm, forward travel per step
+
+_radial = np.stack([np.sin(LEG_ANGLES), np.cos(LEG_ANGLES)], axis=-1)     # Out from the body
+_tangent = np.stack([np.cos(LEG_ANGLES), -np.sin(LEG_ANGLES)], axis=-1)   # Clockwise
+HIPS = BODY_RADIUS * _radial
+
+
+def to_leg_frame(feet):
+    """Body-frame feet (..., 6, 3) -> (out, clockwise, z) from each hip"""
+    feet = np.asarray(feet, np.float64)
+    offset = feet[..., :2] - HIPS
+    out = np.einsum('...lk,lk->...l', offset, _radial)
+    clockwise = np.einsum('...lk,lk->...l', offset, _tangent)
+    return out, clockwise, feet[..., 2]
+
+
+def _servo_order(hip, knee):
+    angles = np.empty(hip.shape[:-1] + (12,), np.float64)
+    angles[..., 0::2] = hip
+    angles[..., 1::2] = knee
+    return angles
+
+
+def solve(feet):
+    """Servo angles (..., 12) and miss distance in mm (..., 6) for feet (..., 6, 3)"""
+    out, clockwise, z = to_leg_frame(feet)
+    hip = 90.0 - np.degrees(np.arctan2(clockwise, out))
+    tilt = np.arcsin(np.clip(z / FEMUR_LENGTH, -1.0, 1.0))
+    knee = 90.0 + np.degrees(tilt)
+    # The foot lands at this distance from the hip, the target may be nearer or further
+    reach = COXA_LENGTH + FEMUR_LENGTH * np.cos(tilt)
+    miss = np.hypot(np.hypot(out, clockwise) - reach, z - FEMUR_LENGTH * np.sin(tilt))
+    return _servo_order(hip, knee), miss
+
+
+def forward(angles):
+    """Body-frame feet (..., 6, 3) for servo angles (..., 12)"""
+    angles = np.asarray(angles, np.float64)
+    swing = np.radians(90.0 - angles[..., 0::2])
+    tilt = np.radians(angles[..., 1::2] - 90.0)
+    reach = COXA_LENGTH + FEMUR_LENGTH * np.cos(tilt)
+    out, clockwise = reach * np.cos(swing), reach * np.sin(swing)
+    xy = HIPS + out[..., None] * _radial + clockwise[..., None] * _tangent
+    return np.concatenate([xy, (FEMUR_LENGTH * np.sin(tilt))[..., None]], axis=-1)
+
+
+def arc_feet(z, swing):
+    """Feet (..., 6, 3) the legs can reach at heights z, swung swing radians clockwise from straight out"""
+    z = np.broadcast_to(np.asarray(z, np.float64), np.shape(swing))
+    tilt = np.arcsin(np.clip(z / FEMUR_LENGTH, -1.0, 1.0))
+    reach = COXA_LENGTH + FEMUR_LENGTH * np.cos(tilt)
+    out, clockwise = reach * np.cos(swing), reach * np.sin(swing)
+    xy = HIPS + out[..., None] * _radial + clockwise[..., None] * _tangent
+    return np.concatenate([xy, z[..., None]], axis=-1)
+
+
+def standing_feet(height=STAND_HEIGHT):
+    """Feet (6, 3) of every leg pointing straight out, hips height above the ground"""
+    return arc_feet(-height, np.zeros(6))
+
+
+class IKTable:
+    """solve() as table lookups: side-to-side angle on an (out, clockwise) grid, up-down on a z grid
+
+    Feet outside the grids are clamped to the nearest cell, like feet the
+    legs can't reach anyway.
+    """
+
+    def __init__(self, step=IK_GRID_STEP):
+        self.step = step
+        span = COXA_LENGTH + FEMUR_LENGTH
+        self.out_min, self.clockwise_min, self.z_min = 0.0, -span, -FEMUR_LENGTH
+        out = np.arange(self.out_min, span + step, step)
+        clockwise = np.arange(self.clockwise_min, span + step, step)
+        z = np.arange(self.z_min, FEMUR_LENGTH + step, step)
+        self.hip = (90.0 - np.degrees(np.arctan2(clockwise[None, :], out[:, None]))).astype(np.float32)
+        tilt = np.arcsin(np.clip(z / FEMUR_LENGTH, -1.0, 1.0))
+        self.knee = (90.0 + np.degrees(tilt)).astype(np.float32)
+        self.reach = (COXA_LENGTH + FEMUR_LENGTH * np.cos(tilt)).astype(np.float32)  # For reachability checks
+
+    def _index(self, values, minimum, size):
+        return np.clip(np.rint((values - minimum) / self.step), 0, size - 1).astype(np.intp)
+
+    def lookup(self, feet, tolerance=IK_TOLERANCE):
+        """Servo angles (..., 12) for feet (..., 6, 3)
+
+        Raises ValueError if a foot lands more than tolerance mm from its
+        target (tolerance=None skips the check).
+        """
+        out, clockwise, z = to_leg_frame(feet)
+        i = self._index(out, self.out_min, self.hip.shape[0])
+        j = self._index(clockwise, self.clockwise_min, self.hip.shape[1])
+        k = self._index(z, self.z_min, len(self.knee))
+        if tolerance is not None:
+            miss = np.hypot(np.hypot(out, clockwise) - self.reach[k], np.maximum(np.abs(z) - FEMUR_LENGTH, 0))
+            if np.any(miss > tolerance):
+                legs = sorted(set(np.nonzero(miss > tolerance)[-1].tolist()))
+                raise ValueError(f"Feet of legs {legs} are out of reach (up to {miss.max():.1f} mm off)")
+        return _servo_order(self.hip[i, j], self.knee[k])
+
+
+_table = None
+
+
+def ik_table():
+    """The shared IKTable, built on first use"""
+    global _table
+    if _table is None:
+        _table = IKTable()
+    return _table
+
+
+def feet_timeline(name, keyframes, speed=1.0):
+    """Timeline from (feet (6, 3), wait at speed 1) keyframes, all keyframes solved in one go
+
+    Raises ValueError if any foot is out of reach.
+    """
+    feet = np.stack([f for f, _ in keyframes])
+    angles = ik_table().lookup(feet)
+    timeline = Timeline(name)
+    for row, (_, wait) in zip(angles, keyframes):
+        timeline.set(list(range(12)), row).wait(wait * speed)
+    return timeline
+
+
+def ik_tripod_timeline(speed=1.0, stride=STRIDE, height=STAND_HEIGHT, lift=STEP_HEIGHT):
+    """Tripod walk in foot space: one tripod swings stride forward while the other pushes back
+
+    The tripods alternate around the circle (legs 0, 2, 4 and 1, 3, 5), so
+    each one stands on a triangle. Every foot swings along the arc it can
+    reach, stride mm from end to end. The front and back legs point along
+    the walking direction, so their arcs run sideways: leg 0 and leg 3
+    push in opposite directions on alternate steps, which cancels out over
+    a cycle.
+    """
+    tilt = np.arcsin(np.clip(-height / FEMUR_LENGTH, -1.0, 1.0))
+    reach = COXA_LENGTH + FEMUR_LENGTH * np.cos(tilt)
+    # Clockwise runs backwards on the right side and forwards on the left, legs 0 and 3 go clockwise
+    direction = np.where(np.round(_tangent[:, 1], 6) < 0, -1.0, 1.0)
+    ahead = direction * stride / 2 / reach
+    tripod_a = np.arange(6) % 2 == 0
+
+    def pose(a_swing, a_lift, b_swing, b_lift):
+        swing = np.where(tripod_a, a_swing, b_swing)
+        z = -height + np.where(tripod_a, a_lift, b_lift)
+        return arc_feet(z, swing)
+
+    keyframes = [
+        (pose(-ahead, lift, ahead, 0), 0.1),   # Lift first tripod
+        (pose(ahead, lift, -ahead, 0), 0.2),   # Swing it forward while the other pushes back
+        (pose(ahead, 0, -ahead, 0), 0.1),      # Put it down
+        (pose(ahead, 0, -ahead, lift), 0.1),   # Lift second tripod
+        (pose(-ahead, 0, ahead, lift), 0.2),   # Swing it forward while the first pushes back
+        (pose(-ahead, 0, ahead, 0), 0.1),      # Put it down
+    ]
+    return feet_timeline("walk", keyframes, speed)
@@ -0,0 +1,65 @@
+from collections import namedtuple
+import numpy as np
+from color_engine import COLOR_LABELS
+
+# Find the light anywhere in the frame instead of only in the center window.
+# The frame is labelled per pixel (color_lut), cut into a rows x cols grid and
+# the labels of every tile are counted in one bincount. From the tile counts
+# we get the winning color, how much of the frame it covers and where its
+# centroid is, which gives the game loop a heading toward the light.
+
+GRID_SIZE = (6, 8)       # rows, cols
+MIN_LIGHT_FRACTION = 0.02  # Less of the frame than this counts as no light
+
+# label: color name ("None" if nothing found), fraction: share of the frame
+# with that color, centroid: (x, y) in label map pixels or None, heading: -1
+# (far left) .. 1 (far right) or None, tiles: rows x cols x len(COLOR_LABELS)
+# vote fractions per tile
+LightLocation = namedtuple("LightLocation", "label fraction centroid heading tiles")
+
+_tile_maps = {}
+
+
+def tile_index_map(shape, grid=GRID_SIZE):
+    """Per-pixel tile number for a label map of this shape (cached)"""
+    key = (shape, grid)
+    if key not in _tile_maps:
+        height, width = shape
+        rows, cols = grid
+        row = (np.arange(height) * rows // height).astype(np.intp)  # intp: bincount won't copy
+        col = (np.arange(width) * cols // width).astype(np.intp)
+        tiles = row[:, None] * cols + col[None, :]
+        _tile_maps[key] = tiles * len(COLOR_LABELS)
+    return _tile_maps[key]
+
+
+def grid_votes(labels, grid=GRID_SIZE, pool=None):
+    """Label fractions per tile, returns a rows x cols x len(COLOR_LABELS) array"""
+    rows, cols = grid
+    tiles = tile_index_map(labels.shape, grid)
+    index = pool.get("grid_index", labels.shape, np.intp) if pool is not None else None
+    index = np.add(tiles, labels, out=index)
+    counts = np.bincount(index.ravel(), minlength=rows * cols * len(COLOR_LABELS))
+    counts = counts.reshape(rows, cols, len(COLOR_LABELS))
+    totals = counts.sum(axis=2, keepdims=True)
+    return counts / np.maximum(totals, 1)
+
+
+def locate_light(labels, grid=GRID_SIZE, min_fraction=MIN_LIGHT_FRACTION, pool=None):
+    """Find the dominant colored light in a label map, returns a LightLocation"""
+    tiles = grid_votes(labels, grid, pool)
+    coverage = tiles.mean(axis=(0, 1))  # Tiles are (almost) equal size
+    best = int(coverage[1:].argmax()) + 1  # Ignore "None"
+    if coverage[best] < min_fraction:
+        return LightLocation("None", float(coverage[0]), None, None, tiles)
+
+    rows, cols = grid
+    height, width = labels.shape
+    weights = tiles[..., best]
+    tile_y = (np.arange(rows) + 0.5) * height / rows
+    tile_x = (np.arange(cols) + 0.5) * width / cols
+    total = weights.sum()
+    x = float((weights.sum(axis=0) * tile_x).sum() / total)
+    y = float((weights.sum(axis=1) * tile_y).sum() / total)
+    heading = 2 * x / width - 1
+    return LightLocation(COLOR_LABELS[best], float(coverage[best]), (x, y), heading, tiles)
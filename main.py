@@ -5,6 +5,8 @@ import numpy as np
 from picamera2 import Picamera2
 from gpiozero import AngularServo, DistanceSensor
 from math import sin, pi
+from color_engine import get_dominant_color, classify_color
+from capture import wait_for_convergence
 
 # Servo Configuration
 # Configured so that the pins should line up in a column on the raspberry pi
@@ -45,33 +47,6 @@ SPEED_THRESHOLDS = {
 }
 TWITCH_CHANCE = 0.05  # 5% chance to twitch on red light
 
-def get_dominant_color(image, k=1):
-    pixels = image.reshape(-1, 3).astype(np.float32)
-    criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 200, 0.1)
-    _, _, centers = cv2.kmeans(pixels, k, None, criteria, 10, cv2.KMEANS_RANDOM_CENTERS)
-    return centers[0].astype(int)[::-1]  # BGR → RGB
-
-def classify_color(rgb):
-    if len(rgb) < 3:
-        return "None"
-    
-    r, g, b = rgb[:3]
-    hsv = cv2.cvtColor(np.uint8([[rgb]]), cv2.COLOR_RGB2HSV)[0][0]
-    hue, sat, val = hsv
-    
-    if sat < 50 or val < 50:
-        return "None"
-    
-    if (hue < 10 or hue > 170) and sat > 100:
-        return "Red"
-    elif 20 < hue < 35 and sat > 80:
-        return "Yellow"
-    elif 35 < hue < 85 and sat > 60:
-        return "Green"
-    elif 85 < hue < 130 and sat > 80:
-        return "Blue"
-    return "None"
-
 def starting_pos():
     for servo in servos:
         servo.angle = 0
@@ -288,7 +263,7 @@ def test_legs_individually():
 def main():
     starting_pos()
     picam2.start()
-    time.sleep(2)  # Camera warm-up
+    wait_for_convergence(picam2)  # Camera warm-up (AE/AWB settle)
     
     current_speed = 0.5
     last_color = None
@@ -0,0 +1,214 @@
+import time
+import threading
+from collections import deque
+import numpy as np
+
+# Servo motions as data, played on their own thread. A Timeline is a list of
+# keyframes "at this time offset, move these servos to these angles", built
+# the same way the gaits were written (set some servos, wait, set others...).
+# The MotionScheduler plays queued timelines at a fixed tick, so whoever
+# starts a motion returns at once and the game loop keeps checking the camera
+# and the distance sensor during a stride instead of only between strides.
+#
+# Angles are 12-vectors in servo order; NaN means "leave this servo alone".
+
+SERVO_COUNT = 12
+MOTION_TICK = 0.01  # Seconds between scheduler ticks
+
+
+class Timeline:
+    """Keyframe timeline for the 12 servos
+
+    set() adds targets at the current time offset, wait() moves the offset
+    on, e.g. Timeline("lift").set([1, 5, 9], 90).wait(0.1).set([0, 4, 8], 120).wait(0.2)
+    """
+
+    def __init__(self, name=None):
+        self.name = name
+        self.duration = 0.0
+        self._times = []
+        self._rows = []
+
+    def set(self, servos, angles):
+        """Move servos (an index or a list) to angles (one angle or one per servo) at the current offset"""
+        if not self._times or self._times[-1] != self.duration:
+            self._times.append(self.duration)
+            self._rows.append(np.full(SERVO_COUNT, np.nan, np.float32))
+        self._rows[-1][servos] = angles
+        return self
+
+    def wait(self, seconds):
+        """Move the time offset on"""
+        self.duration += seconds
+        return self
+
+    @property
+    def times(self):
+        """Keyframe time offsets in seconds"""
+        return np.array(self._times, np.float64)
+
+    @property
+    def angles(self):
+        """Keyframes x 12 target angles, NaN where a keyframe leaves a servo alone"""
+        if not self._rows:
+            return np.empty((0, SERVO_COUNT), np.float32)
+        return np.stack(self._rows)
+
+
+class _Motion:
+    """A timeline being played"""
+
+    def __init__(self, timeline, on_done):
+        self.name = timeline.name
+        self.times = timeline.times
+        self.angles = timeline.angles
+        self.duration = timeline.duration
+        self.on_done = on_done
+        self.start = None
+        self.applied = 0  # Keyframes already written
+
+
+class MotionScheduler:
+    """Plays Timelines on a background thread at a fixed tick
+
+    write(angles) is called on the scheduler thread with a 12-vector of new
+    targets (NaN = unchanged) whenever keyframes come due. enqueue(),
+    replace() and cancel() return immediately. Queued timelines follow each
+    other without a gap.
+
+    If write() or an on_done() callback raises, the thread stops, everything
+    queued is dropped and the error is kept in error; enqueue(), replace(),
+    busy() and wait() then raise it on the caller's thread.
+    """
+
+    def __init__(self, write, tick=MOTION_TICK):
+        self.write = write
+        self.tick = tick
+        self.late_ticks = 0  # Ticks that started more than a tick late
+        self.error = None  # Exception that stopped the thread
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._queue = deque()
+        self._current = None
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        """Start the scheduler thread"""
+        if self._thread is not None:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="motion", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Cancel everything and stop the thread"""
+        self.cancel()
+        with self._lock:
+            self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+
+    def _check(self):
+        if self.error is not None:
+            raise RuntimeError("Motion thread stopped") from self.error
+
+    def enqueue(self, timeline, on_done=None):
+        """Play timeline after everything already queued
+
+        on_done() is called on the scheduler thread once it has played to
+        the end (not when it is cancelled).
+        """
+        with self._lock:
+            self._check()
+            self._queue.append(_Motion(timeline, on_done))
+
+    def replace(self, timeline, on_done=None):
+        """Drop the current and queued motions and play timeline right away"""
+        with self._lock:
+            self._check()
+            self._queue.clear()
+            self._current = None
+            self._queue.append(_Motion(timeline, on_done))
+
+    def cancel(self):
+        """Stop moving, the servos stay where they are"""
+        with self._lock:
+            self._queue.clear()
+            self._current = None
+            self._idle.notify_all()
+
+    @property
+    def current(self):
+        """Name of the timeline playing now, or None"""
+        with self._lock:
+            motion = self._current or (self._queue[0] if self._queue else None)
+            return motion.name if motion is not None else None
+
+    def busy(self):
+        """True while anything is playing or queued"""
+        with self._lock:
+            self._check()
+            return self._current is not None or bool(self._queue)
+
+    def wait(self, timeout=None):
+        """Block until everything queued has played, returns False on timeout"""
+        with self._lock:
+            idle = self._idle.wait_for(
+                lambda: self.error is not None or (self._current is None and not self._queue), timeout)
+            self._check()
+            return idle
+
+    def _run(self):
+        next_tick = time.monotonic()
+        while True:
+            done = None
+            with self._lock:
+                if not self._running:
+                    return
+                now = time.monotonic()
+                motion = self._current
+                if motion is None and self._queue:
+                    motion = self._current = self._queue.popleft()
+                    motion.start = now
+                targets = None
+                if motion is not None:
+                    elapsed = now - motion.start
+                    due = int(np.searchsorted(motion.times, elapsed, side='right'))
+                    if due > motion.applied:
+                        targets = np.full(SERVO_COUNT, np.nan, np.float32)
+                        for row in motion.angles[motion.applied:due]:
+                            np.copyto(targets, row, where=~np.isnan(row))
+                        motion.applied = due
+                    if elapsed >= motion.duration and motion.applied == len(motion.times):
+                        done = motion.on_done
+                        self._current = None
+                        if self._queue:
+                            # Next one starts where this one was due to end, not a tick later
+                            self._current = self._queue.popleft()
+                            self._current.start = motion.start + motion.duration
+                        else:
+                            self._idle.notify_all()
+            try:
+                if targets is not None:
+                    self.write(targets)
+                if done is not None:
+                    done()
+            except Exception as e:
+                print(f"Motion thread stopped: {e!r}")
+                with self._lock:
+                    self.error = e
+                    self._queue.clear()
+                    self._current = None
+                    self._running = False
+                    self._idle.notify_all()
+                return
+
+            next_tick += self.tick
+            delay = next_tick - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            elif delay < -self.tick:
+                self.late_ticks += 1
+                next_tick = time.monotonic()  # Don't try to catch up with a burst of ticks
@@ -4,6 +4,8 @@ import random
 import numpy as np
 from picamera2 import Picamera2
 from gpiozero import AngularServo, DistanceSensor
+from color_engine import get_dominant_color, classify_color
+from capture import wait_for_convergence
 
 # Servo Configuration (keeping original GPIO pins)
 servos = [
@@ -228,7 +230,7 @@ def test_servos():
 def main():
     initialize_servos()
     picam2.start()
-    time.sleep(2)  # Camera warm-up
+    wait_for_convergence(picam2)  # Camera warm-up (AE/AWB settle)
     
     current_speed = 0.5
     last_color = None
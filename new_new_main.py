@@ -1,10 +1,28 @@
-import cv2
 import time
 import random
 import numpy as np
 from picamera2 import Picamera2
 from gpiozero import AngularServo, DistanceSensor, OutputDevice
-from math import sin, pi
+from functools import partial
+from color_engine import set_dominant_color_engine
+from color_lut import load_color_lut
+from capture import configure_vision_camera, lock_exposure, frame_interval, wait_for_convergence, LORES_SIZE, GRID_LORES_SIZE, VISION_ROI
+from vision import detect_frame_color, detect_frame_light, detect_tracked_color, frame_mean_color, YUV_PROFILES
+from roi_tracker import ScreenTracker
+from temporal_filter import ColorFilter
+from transition_detector import TransitionDetector
+from floor_detector import FloorDetector, clearest_side, MIN_FREE
+from odometry import VisualOdometry
+from quality_controller import QualityController, quality_levels
+from light_grid import GRID_SIZE
+from motion_scheduler import MotionScheduler
+from gaits import die_timeline, twitch_timeline
+from gait_library import load_gait_library
+from interpolation import interpolate
+from servo_bank import ServoBank
+from preview_server import PreviewServer
+from vision_worker import VisionWorker
+from frame_source import PicameraSource, WebcamSource
 
 # List of GPIO pins
 pwm_pins = [2, 3, 17, 27, 10, 9, 0, 5, 6, 13, 19, 26]
@@ -55,21 +73,55 @@ servo_offsets = [
     0,   # Leg 6 side-to-side (GPIO 19)
     0    # Leg 6 up-down (GPIO 26)
 ]
-
-# Tripod gait leg groups (indices match servo list)
-TRIPOD_1 = [0, 4, 8]    # Leg1, Leg3, Leg5 (side-to-side)
-TRIPOD_1_UP = [1, 5, 9]  # Corresponding up-down servos
-TRIPOD_2 = [2, 6, 10]    # Leg2, Leg4, Leg6
-TRIPOD_2_UP = [3, 7, 11]
+# All servo writes go through the bank: offsets, clamping and skipping unchanged channels
+servo_bank = ServoBank(servos, servo_offsets)
 
 # Distance Sensor Configuration
 sensor = DistanceSensor(echo=23, trigger=24)
 OBSTACLE_THRESHOLD = 10  # 10cm
+FLOOR_DETECTION = True  # Also check the floor in the bottom of the frame (not with the cropped lores profiles)
 
 # Camera Configuration
-picam2 = Picamera2()
-config = picam2.create_preview_configuration(main={"size": (640, 480)})
-picam2.configure(config)
+# 'lores' (small ISP-cropped YUV stream), 'game' (lores at 90+ fps with exposure/white balance locked)
+# 'preview' (640x480 RGB, ROI sliced on the CPU) or 'webcam' (640x480 BGR from a USB webcam instead of the Pi camera)
+VISION_PROFILE = 'lores'
+VISION_GRID = None  # e.g. (6, 8): search the whole frame in a rows x cols grid instead of the center ROI
+VISION_TRACK_SCREEN = False  # 'preview' profile only: lock the ROI onto the screen instead of the fixed window
+FILTER_WINDOW = 5  # Frames in the label vote window
+FILTER_SWITCH_VOTES = {'Red': 2, 'Green': 3, 'Blue': 4}  # Votes needed to switch (lower = faster, higher = fewer false triggers)
+EARLY_TRANSITIONS = True  # Act on red/green while the screen is still fading (see transition_detector.py)
+EARLY_HOLD = 0.6  # Seconds an early switch is held while waiting for the filter to confirm it
+PREVIEW = False  # True: serve annotated frames as MJPEG on port 8080 (see preview_server.py)
+picam2 = Picamera2() if VISION_PROFILE != 'webcam' else None
+if VISION_PROFILE == 'webcam':
+    lores_size = None
+elif VISION_PROFILE in YUV_PROFILES and VISION_GRID:
+    lores_size = GRID_LORES_SIZE
+    vision_stream = configure_vision_camera(picam2, roi=None, lores_size=lores_size,
+                                            fast=VISION_PROFILE == 'game')
+elif VISION_PROFILE in YUV_PROFILES:
+    lores_size = LORES_SIZE
+    vision_stream = configure_vision_camera(picam2, fast=VISION_PROFILE == 'game')
+else:
+    lores_size = None
+    config = picam2.create_preview_configuration(main={"size": (640, 480)})
+    picam2.configure(config)
+    vision_stream = "main"
+if picam2 is None:
+    camera = WebcamSource(size=(640, 480))
+else:
+    camera = PicameraSource(picam2, stream=vision_stream,
+                            color_order='yuv420' if VISION_PROFILE in YUV_PROFILES else 'rgb')
+ODOMETRY = True  # Estimate forward progress and yaw from the camera (not with the cropped lores profiles)
+odometry = VisualOdometry() if ODOMETRY and (VISION_PROFILE not in YUV_PROFILES or VISION_GRID) else None
+
+# Vision Configuration
+COLOR_CLASSIFIER = 'lut'  # 'lut' (per-pixel vote) or 'dominant' (dominant color + classify_color)
+DOMINANT_COLOR_ENGINE = 'histogram'  # 'histogram', 'mean' or 'kmeans' (old, slow)
+VISION_WORKER = False  # True: classify in a separate process so servo timing doesn't jitter
+ADAPTIVE_QUALITY = True  # Trade ROI decimation, frame skip and grid size for a steady loop rate (not with VISION_WORKER)
+QUALITY_FALLBACK_CLASSIFIER = None  # e.g. 'mean': classifier for the cheapest quality levels (None = COLOR_CLASSIFIER)
+TARGET_LOOP_HZ = 10
 
 # Game Parameters
 SPEED_THRESHOLDS = {
@@ -81,9 +133,22 @@ TWITCH_CHANCE = 0.05  # 5% chance to twitch on red light
 
 def set_servo_angle(servo_index, angle):
     """Set servo angle with calibration offset"""
-    adjusted_angle = angle + servo_offsets[servo_index]
-    adjusted_angle = max(0, min(180, adjusted_angle))
-    servos[servo_index].angle = adjusted_angle
+    servo_bank.set(servo_index, angle)
+
+# Gaits play on the motion thread, callers return right away. Each keyframe
+# is one batched write of all 12 targets (NaN = leave alone).
+motion = MotionScheduler(servo_bank.write)
+# Fixed gaits come precompiled from gait_library.npz (rebuilt from gaits.py when missing or outdated)
+gait_library = load_gait_library()
+WALK_GAIT = 'tripod2'  # Gait walked on green: 'tripod2' (servo angles) or 'ik_tripod' (foot space, see leg_ik.py)
+SMOOTH_GAITS = 'minjerk'  # Ease every leg into each keyframe together ('sine', 'cubic', 'minjerk'), None = jump
+
+def gait_motion(name, speed=1.0):
+    """A library gait, eased from where the servos are now if SMOOTH_GAITS is set"""
+    gait = gait_library.gait(name, speed)
+    if SMOOTH_GAITS:
+        gait = interpolate(gait, start=servo_bank.angles(), easing=SMOOTH_GAITS)
+    return gait
 
 def calibrate_servos():
     """Interactive calibration routine"""
@@ -115,188 +180,50 @@ def calibrate_servos():
 def initialize_servos():
     """Initialize all servos to default positions"""
     print("Initializing servos to default positions...")
-    for i in range(len(servos)):
-        set_servo_angle(i, 90)
+    servo_bank.write(np.full(len(servos), 90.0), force=True)
     time.sleep(1)
 
-def get_dominant_color(image, k=1):
-    """Get dominant color from image"""
-    pixels = image.reshape(-1, 3).astype(np.float32)
-    criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 200, 0.1)
-    _, _, centers = cv2.kmeans(pixels, k, None, criteria, 10, cv2.KMEANS_RANDOM_CENTERS)
-    return centers[0].astype(int)[::-1]  # BGR → RGB
-
-def classify_color(rgb):
-    """Classify color from RGB values"""
-    if len(rgb) < 3:
-        return "None"
-    
-    r, g, b = rgb[:3]
-    hsv = cv2.cvtColor(np.uint8([[rgb]]), cv2.COLOR_RGB2HSV)[0][0]
-    hue, sat, val = hsv
-    
-    if sat < 50 or val < 50:
-        return "None"
-    if (hue < 10 or hue > 170) and sat > 100:
-        return "Red"
-    elif 20 < hue < 35 and sat > 80:
-        return "Yellow"
-    elif 35 < hue < 85 and sat > 60:
-        return "Green"
-    elif 85 < hue < 130 and sat > 80:
-        return "Blue"
-    return "None"
-
 def spider_die():
-    """Make the spider 'die' by curling up"""
+    """Make the spider 'die' by curling up (blocks until it is back at neutral)"""
     print("Spider bot died!")
-    for i in range(0, len(servos), 2):  # Side-to-side
-        servos[i].angle = 30 if random.random() > 0.5 else 150
-    for i in range(1, len(servos), 2):  # Up-down
-        servos[i].angle = 150
-    time.sleep(3)
-    initialize_servos()
+    motion.replace(die_timeline())
+    motion.wait()
 
 def random_twitch():
     """Make a random leg twitch"""
     leg = random.randint(0, 5)
-    updown_servo = leg * 2 + 1
     print(f"Leg {leg+1} twitched!")
-    servos[updown_servo].angle = 90
-    time.sleep(0.1)
-    servos[updown_servo].angle = 60
-    time.sleep(0.1)
-    servos[updown_servo].angle = 90
-    time.sleep(0.1)
-    servos[updown_servo].angle = 60
+    motion.enqueue(twitch_timeline(leg))
 
 def get_random_speed():
     """Get random speed within thresholds"""
     speed_category = random.choice(list(SPEED_THRESHOLDS.keys()))
     return random.uniform(*SPEED_THRESHOLDS[speed_category])
 
+def report_gait_cycle():
+    """Print what the odometry saw during the last gait cycle (scheduler thread)"""
+    if odometry is not None:
+        cycle = odometry.cycle()
+        print(f"Gait cycle: forward {cycle.forward:.3f}, yaw {cycle.yaw:+.1f} deg")
+
 def walk_forward_tripod1(speed):
-    """Tripod gait walking"""
-    # Phase 1: Lift and swing TRIPOD_1
-    for up_servo in TRIPOD_1_UP:
-        set_servo_angle(up_servo, 90)
-    time.sleep(0.1 * speed)
-    
-    for side_servo in TRIPOD_1:
-        set_servo_angle(side_servo, 120)
-    time.sleep(0.2 * speed)
-    
-    for up_servo in TRIPOD_1_UP:
-        set_servo_angle(up_servo, 60)
-    time.sleep(0.1 * speed)
-    
-    # Phase 2: Lift and swing TRIPOD_2
-    for up_servo in TRIPOD_2_UP:
-        set_servo_angle(up_servo, 90)
-    time.sleep(0.1 * speed)
-    
-    for side_servo in TRIPOD_2:
-        set_servo_angle(side_servo, 60)
-    time.sleep(0.2 * speed)
-    
-    for up_servo in TRIPOD_2_UP:
-        set_servo_angle(up_servo, 60)
-    time.sleep(0.1 * speed)
-    
-    # Phase 3: Push back
-    for side_servo in TRIPOD_1:
-        set_servo_angle(side_servo, 90)
-    time.sleep(0.2 * speed)
-    
-    for side_servo in TRIPOD_2:
-        set_servo_angle(side_servo, 90)
-    time.sleep(0.1 * speed)
+    """Queue one tripod gait cycle, returns right away"""
+    motion.enqueue(gait_motion("tripod1", speed), on_done=report_gait_cycle)
 
 def walk_forward_tripod2(speed):
-    """
-    Tripod gait for circular leg arrangement (6 legs in circle starting from front)
-    Leg numbering (view from top):
-        [0] Front
-      5     1
-     4     2
-        [3] Back
-    Servo indices (2 per leg - even:side-to-side, odd:up-down):
-    [0] Leg0-side, [1] Leg0-up
-    [2] Leg1-side, [3] Leg1-up
-    ...
-    [10] Leg5-side, [11] Leg5-up
-    """
-    # Define tripod groups for circular arrangement
-    TRIPOD_A = [0, 2, 4]    # Leg0, Leg1, Leg2 (Front, Front-right, Middle-right)
-    TRIPOD_A_UP = [1, 3, 5]  # Corresponding up-down servos
-    TRIPOD_B = [6, 8, 10]    # Leg3, Leg4, Leg5 (Back, Middle-left, Front-left)
-    TRIPOD_B_UP = [7, 9, 11]
+    """Queue one cycle of the circular-layout tripod gait, returns right away"""
+    motion.enqueue(gait_motion("tripod2", speed), on_done=report_gait_cycle)
 
-    # Phase 1: Lift and swing first tripod
-    for up_servo in TRIPOD_A_UP:
-        set_servo_angle(up_servo, 80)  # Lift legs
-    time.sleep(0.1 * speed)
-    
-    for side_servo in TRIPOD_A:
-        set_servo_angle(side_servo, 120)  # Swing forward
-    time.sleep(0.2 * speed)
-    
-    # Phase 2: Lower first tripod while lifting second
-    for up_servo in TRIPOD_A_UP:
-        set_servo_angle(up_servo, 40)  # Partial lower for pushing
-    time.sleep(0.1 * speed)
-    
-    for up_servo in TRIPOD_B_UP:
-        set_servo_angle(up_servo, 80)  # Lift opposite tripod
-    time.sleep(0.1 * speed)
-    
-    # Phase 3: Swing second tripod forward
-    for side_servo in TRIPOD_B:
-        set_servo_angle(side_servo, 60)  # Swing forward opposite side
-    time.sleep(0.2 * speed)
-    
-    # Phase 4: Lower second tripod
-    for up_servo in TRIPOD_B_UP:
-        set_servo_angle(up_servo, 40)  # Partial lower
-    time.sleep(0.1 * speed)
-    
-    # Phase 5: Return to neutral position
-    for i in range(12):
-        set_servo_angle(i, 90)  # Center all servos
-    time.sleep(0.1 * speed)
+def walk_forward(speed):
+    """Queue one cycle of WALK_GAIT, returns right away"""
+    motion.enqueue(gait_motion(WALK_GAIT, speed), on_done=report_gait_cycle)
 
-def avoid_obstacle_tripod():
-    """Avoid obstacle with side-step"""
-    direction = random.choice(['left', 'right'])
+def avoid_obstacle_tripod(direction=None):
+    """Side-step away from an obstacle (random side if direction isn't given), returns right away"""
+    if direction is None:
+        direction = random.choice(['left', 'right'])
     print(f"Obstacle detected! Side-stepping {direction}")
-    
-    for _ in range(3):
-        if direction == 'left':
-            for up_servo in TRIPOD_1_UP:
-                set_servo_angle(up_servo, 90)
-            time.sleep(0.1)
-            
-            for side_servo in TRIPOD_1:
-                set_servo_angle(side_servo, 120)
-            time.sleep(0.2)
-            
-            for up_servo in TRIPOD_1_UP:
-                set_servo_angle(up_servo, 60)
-            time.sleep(0.1)
-        else:
-            for up_servo in TRIPOD_2_UP:
-                set_servo_angle(up_servo, 90)
-            time.sleep(0.1)
-            
-            for side_servo in TRIPOD_2:
-                set_servo_angle(side_servo, 60)
-            time.sleep(0.2)
-            
-            for up_servo in TRIPOD_2_UP:
-                set_servo_angle(up_servo, 60)
-            time.sleep(0.1)
-            
-        time.sleep(0.2)
+    motion.replace(gait_motion(f"avoid_{direction}"))
 
 def test_servos():
     """Test all servos with current calibration"""
@@ -376,54 +303,191 @@ def test_servos():
 def main():
     initialize_pins()
     initialize_servos()
-    picam2.start()
-    time.sleep(2)  # Camera warm-up
+    set_dominant_color_engine(DOMINANT_COLOR_ENGINE)
+    load_color_lut(space='yuv' if VISION_PROFILE in YUV_PROFILES else 'bgr')
+    if picam2 is not None:
+        picam2.start()
+        settled, waited = wait_for_convergence(picam2)  # Camera warm-up
+        print(f"Camera {'settled' if settled else 'did not settle'} after {waited:.2f}s")
+    if VISION_PROFILE == 'game':
+        lock_exposure(picam2)
+        print(f"Camera frame interval: {frame_interval(picam2) * 1000:.1f} ms")
+    classify_frame = partial(detect_frame_color, profile=VISION_PROFILE, classifier=COLOR_CLASSIFIER,
+                             grid=VISION_GRID, lores_size=lores_size)
+    vision_worker = None
+    if VISION_WORKER:
+        # Fork the worker before any of our threads (capture, odometry, motion) run
+        if picam2 is not None:
+            first_frame = picam2.capture_array(vision_stream)
+        else:
+            first_frame = camera.probe()
+        vision_worker = VisionWorker(classify_frame, first_frame.shape, first_frame.dtype)
+        vision_worker.start()
+    camera.start()
+    if odometry is not None:
+        odometry.attach(camera, lores_size)
+    motion.start()
     
     current_speed = 0.5
     last_color = None
+    last_frame_id = 0
+    last_result_id = 0
+    light_heading = None  # -1 (left) .. 1 (right), only known in grid mode
+    screen_tracker = ScreenTracker() if VISION_TRACK_SCREEN and VISION_PROFILE == 'preview' else None
+    color_filter = ColorFilter(window=FILTER_WINDOW, switch_votes=FILTER_SWITCH_VOTES)
+    transition_detector = TransitionDetector() if EARLY_TRANSITIONS else None
+    early_label = None
+    early_until = 0.0
+    floor_detector = None
+    free_space = None
+    if FLOOR_DETECTION and (VISION_PROFILE not in YUV_PROFILES or VISION_GRID):
+        # The floor in front is assumed clear at the start
+        floor_detector = FloorDetector(camera.color_order, lores_size)
+        first_frame, _, _ = camera.read(wait=True)
+        if first_frame is not None:
+            floor_detector.learn(first_frame)
+    preview = PreviewServer() if PREVIEW else None
+    if preview is not None:
+        preview.start()
+    loop_hz = None
+    frame_age = None  # Capture to classification, averaged
+    last_loop_time = time.monotonic()
+    quality = None
+    if ADAPTIVE_QUALITY and vision_worker is not None:
+        print("Adaptive quality is off: the vision worker classifies at full quality")
+    elif ADAPTIVE_QUALITY:
+        levels = quality_levels(COLOR_CLASSIFIER, VISION_GRID or GRID_SIZE, QUALITY_FALLBACK_CLASSIFIER)
+        quality = QualityController(TARGET_LOOP_HZ, levels)
     
     try:
         while True:
             # Check for obstacles
             distance = sensor.distance * 100  # Convert to cm
-            if distance < OBSTACLE_THRESHOLD:
-                avoid_obstacle_tripod()
-                continue
+            floor_blocked = free_space is not None and free_space.centre < MIN_FREE
+            if (distance < OBSTACLE_THRESHOLD or floor_blocked) and not str(motion.current).startswith("avoid"):
+                if floor_blocked:
+                    print(f"Floor blocked ahead (free {free_space.left:.2f}/{free_space.centre:.2f}/{free_space.right:.2f})")
+                avoid_obstacle_tripod(clearest_side(free_space) if free_space is not None else None)
+                free_space = None  # Look again after moving
+                continue  # The side-step plays on the motion thread, vision keeps running meanwhile
+            
+            if quality is not None:
+                quality.begin()
+                level = quality.level
+                classifier, step = level.classifier, level.decimation
+                grid = level.grid if VISION_GRID else None
+            else:
+                classifier, step, grid = COLOR_CLASSIFIER, 1, VISION_GRID
+            
+            # Grab the newest frame from the capture thread (skip if already seen); a lazily
+            # decoding webcam only has it after a short wait, its non-waiting read lags a loop
+            image, timestamp, frame_id = camera.read(wait=camera.lazy_decode)
+            if frame_id == last_frame_id or (quality is not None and quality.skip_frame()):
+                image = None
+            last_frame_id = frame_id
+            if image is not None:
+                age = camera.age(timestamp)
+                frame_age = age if frame_age is None else 0.9 * frame_age + 0.1 * age
+            if floor_detector is not None and image is not None and image.size > 0:
+                free_space = floor_detector.free_space(image)
+            color_name = None
+            if vision_worker is not None:
+                if image is not None and image.size > 0:
+                    vision_worker.submit(image, timestamp, frame_id)
+                # Act on the newest finished result, usually one frame behind
+                color_name, confidence, result_id, _, _ = vision_worker.result()
+                if result_id == last_result_id:
+                    color_name = None
+                last_result_id = result_id
+            elif image is not None and image.size > 0 and grid:
+                light = detect_frame_light(image, VISION_PROFILE, grid, lores_size, step=step)
+                color_name, confidence, light_heading = light.label, light.fraction, light.heading
+            elif image is not None and image.size > 0 and screen_tracker is not None:
+                color_name, confidence = detect_tracked_color(image, screen_tracker, classifier)
+            elif image is not None and image.size > 0:
+                color_name, confidence = classify_frame(image, classifier=classifier, step=step)
             
-            # Capture and process image
-            image = picam2.capture_array()
+            mean_color = None
             if image is not None and image.size > 0:
-                image = cv2.cvtColor(image, cv2.COLOR_RGB2BGR)
-                roi = image[100:400, 200:500]
+                mean_color = frame_mean_color(image, VISION_PROFILE, lores_size)
+            if color_name is not None:
+                # Debounce: act on the filtered label, not the single frame
+                color_name = color_filter.update(color_name, confidence, mean_color)
+                if color_name != last_color and last_color is not None:
+                    running = color_filter.color
+                    print(f"Switched to {color_name} after {color_filter.frames_to_switch} frames"
+                          + (f" (running color {tuple(round(c) for c in running)})" if running else ""))
+            
+            if transition_detector is not None and mean_color is not None:
+                early = transition_detector.update(mean_color)
+                if early is not None and early != last_color:
+                    print(f"Switching to {early} (fade {transition_detector.progress:.0%} done)")
+                    early_label, early_until = early, time.monotonic() + EARLY_HOLD
+            if early_label is not None:
+                if color_name == early_label or time.monotonic() > early_until:
+                    early_label = None  # Filter caught up (or the fade turned back)
+                else:
+                    color_name = early_label
+            
+            if quality is not None and quality.end():
+                print(f"Vision quality level {quality.index}: {quality.level} ({quality.reason})")
                 
-                if roi.size > 0:
-                    dominant_color = get_dominant_color(roi)
-                    color_name = classify_color(dominant_color)
-                    
-                    # Game logic
-                    if color_name == "Green":
-                        if last_color != "Green":
-                            current_speed = get_random_speed()
-                            print(f"Green light! Walking at speed: {current_speed:.2f}")
-                        test_servos()
-                    elif color_name == "Red":
-                        if last_color != "Red":
-                            print("Red light! Freeze!")
-                        if random.random() < TWITCH_CHANCE:
-                            random_twitch()
-                    elif color_name == "Blue":
-                        print("Game over! Blue light detected.")
-                        spider_die()
-                        break
-                    
-                    last_color = color_name
+            if color_name is not None:
+                # Game logic
+                if color_name == "Green":
+                    if last_color != "Green":
+                        current_speed = get_random_speed()
+                        print(f"Green light! Walking at speed: {current_speed:.2f}")
+                        if light_heading is not None:
+                            print(f"Light is at heading {light_heading:+.2f}")
+                    if not motion.busy():
+                        walk_forward(current_speed)  # Next stride, the loop keeps watching meanwhile
+                elif color_name == "Red":
+                    if last_color != "Red":
+                        print("Red light! Freeze!")
+                        motion.cancel()  # Stop mid-stride
+                    if not motion.busy() and random.random() < TWITCH_CHANCE:
+                        random_twitch()
+                elif color_name == "Blue":
+                    print("Game over! Blue light detected.")
+                    spider_die()
+                    break
+                
+                last_color = color_name
+            
+            now = time.monotonic()
+            hz = 1 / max(now - last_loop_time, 1e-6)
+            loop_hz = hz if loop_hz is None else 0.9 * loop_hz + 0.1 * hz
+            last_loop_time = now
+            if preview is not None and image is not None:
+                if VISION_PROFILE in YUV_PROFILES:
+                    preview.publish(image, color_name, None, loop_hz, 'yuv420', lores_size)
+                else:
+                    box = screen_tracker.box if screen_tracker is not None else VISION_ROI
+                    preview.publish(image, color_name, box, loop_hz, camera.color_order)
             
-            time.sleep(0.1)
+            if quality is not None:
+                quality.pace()
+            else:
+                time.sleep(0.1)
     
     except KeyboardInterrupt:
         print("\nProgram stopped by user")
     finally:
-        picam2.stop()
+        if preview is not None:
+            preview.stop()
+        camera.stop()
+        if odometry is not None:
+            odometry.stop()
+            moved = odometry.total()
+            print(f"Odometry: forward {moved.forward:.3f}, yaw {moved.yaw:+.1f} deg over {moved.frames} frames")
+        if frame_age is not None:
+            print(f"Average frame age: {frame_age * 1000:.1f} ms ({type(camera).__name__})")
+        if vision_worker is not None:
+            vision_worker.stop()
+        if picam2 is not None:
+            picam2.stop()
+        motion.stop()
         initialize_servos()
 
 if __name__ == "__main__":
@@ -0,0 +1,188 @@
+import math
+import time
+import threading
+from collections import namedtuple
+import cv2
+import numpy as np
+from capture import split_yuv420
+
+# How far did the spider actually move? A few dozen corner features are
+# tracked from frame to frame with pyramidal Lucas-Kanade on a small
+# grayscale copy of the camera stream. A similarity transform fitted to the
+# tracks (RANSAC, so legs and the moving screen don't throw it off) gives:
+#   yaw:     the horizontal shift at the image center, as an angle through
+#            the camera's field of view
+#   forward: log of the zoom factor; the scene grows as the camera moves
+#            toward it. Unitless (depends on how far away things are); set
+#            FORWARD_CM_PER_UNIT after measuring a walk to get centimetres.
+# New features are only searched for when too many tracks were lost, and
+# the feature count shrinks when a frame goes over the CPU budget.
+# Not for the plain lores stream: it only sees the screen, whose content moves on its own.
+
+ODOMETRY_SIZE = (160, 120)  # Grayscale frame the tracking runs on
+MAX_FEATURES = 60
+MIN_FEATURES = 20          # Budget cuts never go below this
+MIN_TRACKS = 15            # Fewer surviving tracks than this -> search new features
+FRAME_BUDGET = 0.004       # Seconds of CPU per frame
+CAMERA_HFOV = 62.2         # Horizontal field of view in degrees (Camera Module 2)
+FORWARD_CM_PER_UNIT = None  # Calibration for forward, None reports the raw zoom units
+LK_PARAMS = dict(winSize=(15, 15), maxLevel=2,
+                 criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 10, 0.03))
+
+# forward: zoom units (or cm once calibrated), yaw: degrees, positive = turned
+# right, frames: frames that contributed
+Motion = namedtuple("Motion", "forward yaw frames")
+
+
+def gray_frame(frame, color_order='rgb', size=ODOMETRY_SIZE, lores_size=None, dst=None):
+    """Small grayscale copy of a captured frame for tracking"""
+    if color_order == 'yuv420':
+        gray = split_yuv420(frame, lores_size)[0]  # Luma plane is grayscale already
+    elif color_order == 'gray':
+        gray = frame
+    else:
+        gray = cv2.cvtColor(frame, cv2.COLOR_RGB2GRAY if color_order == 'rgb' else cv2.COLOR_BGR2GRAY)
+    return cv2.resize(gray, size, dst=dst, interpolation=cv2.INTER_AREA)
+
+
+class VisualOdometry:
+    """Running forward/yaw estimate from sparse optical flow
+
+    Either call update() with small grayscale frames yourself, or attach()
+    it to a frame_source.FrameSource to track every captured frame on a
+    background thread. total() and cycle() can be read from any thread.
+    """
+
+    def __init__(self, size=ODOMETRY_SIZE, max_features=MAX_FEATURES, min_tracks=MIN_TRACKS,
+                 budget=FRAME_BUDGET, hfov=CAMERA_HFOV, cm_per_unit=FORWARD_CM_PER_UNIT):
+        self.size = size
+        self.max_features = max_features
+        self.features = max_features  # Current feature cap, lowered when over budget
+        self.min_tracks = min_tracks
+        self.budget = budget
+        self.hfov = hfov
+        self.cm_per_unit = cm_per_unit
+        self.tracks = 0          # Features tracked in the last frame
+        self.reseeds = 0
+        self.over_budget = 0     # Frames that took longer than the budget
+        self.last_cost = 0.0     # Seconds the last update took
+        self._lock = threading.Lock()
+        self._forward = 0.0
+        self._yaw = 0.0
+        self._frames = 0
+        self._cycle_start = (0.0, 0.0, 0)
+        self._prev = None
+        self._points = None
+        # attach() state
+        self._pending = threading.Condition(threading.Lock())
+        self._slots = [np.empty(size[::-1], np.uint8) for _ in range(2)]
+        self._fresh = False
+        self._color_order = 'rgb'
+        self._lores_size = None
+        self._thread = None
+        self._running = False
+
+    def update(self, gray):
+        """Track one grayscale frame (size ODOMETRY_SIZE) against the previous one"""
+        start = time.perf_counter()
+        forward = yaw = 0.0
+        moved = False
+        if self._prev is not None and self._points is not None and len(self._points):
+            points, status, _ = cv2.calcOpticalFlowPyrLK(self._prev, gray, self._points, None, **LK_PARAMS)
+            good = status.ravel() == 1
+            old, new = self._points[good], points[good]
+            self._points = new.reshape(-1, 1, 2)
+            if len(old) >= 6:
+                matrix, inliers = cv2.estimateAffinePartial2D(old, new, method=cv2.RANSAC,
+                                                              ransacReprojThreshold=2.0)
+                if matrix is not None:
+                    scale = math.hypot(matrix[0, 0], matrix[1, 0])
+                    center = np.array([self.size[0] / 2, self.size[1] / 2, 1.0])
+                    shift_x = float(matrix[0] @ center - center[0])
+                    forward = math.log(max(scale, 1e-6))
+                    yaw = -shift_x / self.size[0] * self.hfov  # Scene moving left = turning right
+                    moved = True
+                    self._points = new[inliers.ravel() == 1].reshape(-1, 1, 2)
+
+        self.tracks = 0 if self._points is None else len(self._points)
+        if self.tracks < self.min_tracks and time.perf_counter() - start < self.budget / 2:
+            # Too many tracks lost: start over with fresh corners (skipped if the frame is already expensive)
+            self._points = cv2.goodFeaturesToTrack(gray, self.features, 0.01, 7)
+            self.tracks = 0 if self._points is None else len(self._points)
+            self.reseeds += 1
+
+        if self._prev is None or self._prev.shape != gray.shape:
+            self._prev = np.empty_like(gray)
+        np.copyto(self._prev, gray)
+        with self._lock:
+            if moved:
+                self._forward += forward
+                self._yaw += yaw
+                self._frames += 1
+
+        self.last_cost = time.perf_counter() - start
+        if self.last_cost > self.budget:
+            self.over_budget += 1
+            self.features = max(MIN_FEATURES, int(self.features * 0.8))
+        elif self.last_cost < self.budget / 2 and self.features < self.max_features:
+            self.features += 1
+
+    def _motion(self, forward, yaw, frames):
+        if self.cm_per_unit is not None:
+            forward *= self.cm_per_unit
+        return Motion(forward, yaw, frames)
+
+    def total(self):
+        """Motion since the start (or the last reset)"""
+        with self._lock:
+            return self._motion(self._forward, self._yaw, self._frames)
+
+    def cycle(self):
+        """Motion since the last call, e.g. once per gait cycle"""
+        with self._lock:
+            forward, yaw, frames = self._cycle_start
+            self._cycle_start = (self._forward, self._yaw, self._frames)
+            return self._motion(self._forward - forward, self._yaw - yaw, self._frames - frames)
+
+    def reset(self):
+        """Zero the running estimate"""
+        with self._lock:
+            self._forward = self._yaw = 0.0
+            self._frames = 0
+            self._cycle_start = (0.0, 0.0, 0)
+
+    def attach(self, source, lores_size=None):
+        """Track every frame of a started FrameSource on a background thread"""
+        self._color_order = source.color_order
+        self._lores_size = lores_size
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="odometry", daemon=True)
+        self._thread.start()
+        source.add_listener(self._submit)
+
+    def stop(self):
+        with self._pending:
+            self._running = False
+            self._pending.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+
+    def _submit(self, frame, timestamp):
+        # Capture thread: shrink into the free slot and hand it over, dropping
+        # the previous one if tracking hasn't caught up
+        gray_frame(frame, self._color_order, self.size, self._lores_size, dst=self._slots[1])
+        with self._pending:
+            self._slots.reverse()
+            self._fresh = True
+            self._pending.notify()
+
+    def _run(self):
+        while True:
+            with self._pending:
+                self._pending.wait_for(lambda: self._fresh or not self._running)
+                if not self._running:
+                    return
+                self._fresh = False
+                gray = self._slots[0].copy()
+            self.update(gray)
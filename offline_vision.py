@@ -0,0 +1,84 @@
+import cv2
+import numpy as np
+from color_engine import DOMINANT_COLOR_ENGINES, classify_color
+from color_lut import classify_roi, classify_yuv_planes
+from capture import split_yuv420, PREVIEW_SIZE, VISION_ROI
+
+# Shared by the offline tools (bench_vision.py, label_footage.py): every
+# classifier in one table, and recorded frames turned into the BGR vision ROI
+# the game loop would have classified, whatever the recording holds.
+
+
+def bgr_to_yuv420_planes(frame):
+    """Y, U, V planes the lores stream would deliver for this BGR frame"""
+    h, w = frame.shape[:2]
+    ycrcb = cv2.cvtColor(np.ascontiguousarray(frame[:h - h % 2, :w - w % 2]), cv2.COLOR_BGR2YCrCb)
+    y = ycrcb[..., 0]
+    chroma = cv2.resize(ycrcb, (y.shape[1] // 2, y.shape[0] // 2), interpolation=cv2.INTER_AREA)
+    return y, np.ascontiguousarray(chroma[..., 2]), np.ascontiguousarray(chroma[..., 1])
+
+
+def make_classifiers():
+    """All classifiers as name -> (prepare(BGR roi), classify(prepared) -> (color name, confidence))
+
+    prepare does whatever isn't part of the classifier itself (e.g. producing
+    YUV planes), so tools can leave it out of their timings. Confidence is
+    the vote fraction, always 1.0 for the dominant-color engines.
+    """
+    classifiers = {}
+    for engine_name, engine in DOMINANT_COLOR_ENGINES.items():
+        classifiers[engine_name] = (
+            lambda roi: roi,
+            lambda roi, engine=engine: (classify_color(engine(roi)), 1.0),
+        )
+    classifiers['lut'] = (lambda roi: roi, classify_roi)
+    classifiers['lut-yuv'] = (bgr_to_yuv420_planes, lambda planes: classify_yuv_planes(*planes))
+    return classifiers
+
+
+def default_roi(frame_size):
+    """The game ROI for preview-sized (width, height) frames, the whole frame otherwise"""
+    return VISION_ROI if tuple(frame_size) == PREVIEW_SIZE else None
+
+
+def recording_roi(frame, color_order='bgr', frame_size=None, roi=None):
+    """Contiguous BGR roi (x, y, w, h; None = whole frame) of one recorded frame
+
+    color_order is what the frame holds: 'bgr' (a 4th channel is dropped),
+    'rgb' (RGB or RGBX) or 'yuv420', which needs frame_size (width, height)
+    since its array is 1.5x taller and may be padded to the stride.
+    """
+    if color_order == 'yuv420':
+        width, height = frame_size
+        planes = split_yuv420(frame, frame_size)
+        i420 = np.concatenate([plane.ravel() for plane in planes]).reshape(height * 3 // 2, width)
+        frame = cv2.cvtColor(i420, cv2.COLOR_YUV2BGR_I420)
+    if roi is not None:
+        x, y, w, h = roi
+        frame = frame[y:y + h, x:x + w]
+    frame = frame[..., 2::-1] if color_order == 'rgb' else frame[..., :3]  # RGB(X) -> BGR
+    return np.ascontiguousarray(frame)
+
+
+class RecordingROIs:
+    """BGR vision ROIs of recorded frames, converted one at a time as they are read
+
+    Nothing is converted or loaded up front, so a memory-mapped recording
+    stays on disk however long it is.
+    """
+
+    def __init__(self, frames, color_order, frame_size):
+        self.frames = frames
+        self.color_order = color_order
+        self.frame_size = tuple(frame_size)
+        self.roi = default_roi(self.frame_size)
+
+    def __len__(self):
+        return len(self.frames)
+
+    def __getitem__(self, index):
+        return recording_roi(self.frames[index], self.color_order, self.frame_size, self.roi)
+
+    def __iter__(self):
+        for frame in self.frames:
+            yield recording_roi(frame, self.color_order, self.frame_size, self.roi)
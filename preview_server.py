@@ -0,0 +1,190 @@
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import cv2
+import numpy as np
+from capture import split_yuv420
+
+# Live camera preview over HTTP (MJPEG) instead of cv2.imshow, so the robot
+# can run headless over SSH and the control loop never waits on a display.
+# publish() only hands the newest frame to a background encoder thread; it
+# drops the frame if nobody is watching or the encoder is still busy.
+#
+# Open http://<pi address>:8080/ in a browser to watch.
+
+PREVIEW_PORT = 8080
+PREVIEW_MAX_FPS = 10
+PREVIEW_QUALITY = 70
+
+PAGE = b"""<html><head><title>Spider camera</title></head>
+<body style="margin:0;background:#222"><img src="/stream.mjpg" style="width:100%"></body></html>"""
+
+
+class PreviewServer:
+    """Background MJPEG server for annotated camera frames"""
+
+    def __init__(self, port=PREVIEW_PORT, max_fps=PREVIEW_MAX_FPS, quality=PREVIEW_QUALITY):
+        self.port = port
+        self.min_interval = 1.0 / max_fps
+        self.quality = quality
+        self.clients = 0
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self._pending = threading.Condition(self._lock)  # Encoder waits for a frame
+        self._encoded = threading.Condition(self._lock)  # Clients wait for a JPEG
+        self._frame = None        # Copy of the frame waiting to be encoded
+        self._annotations = None
+        self._busy = False        # Encoder working on a frame
+        self._jpeg = None
+        self._jpeg_id = 0
+        self._last_publish = 0.0
+        self._running = False
+        self._server = None
+        self._threads = []
+
+    def start(self):
+        """Start the HTTP server and encoder threads"""
+        if self._running:
+            return
+        self._running = True
+        self._server = ThreadingHTTPServer(("", self.port), self._make_handler())
+        self._server.daemon_threads = True
+        self._threads = [
+            threading.Thread(target=self._server.serve_forever, name="preview-http", daemon=True),
+            threading.Thread(target=self._encode_loop, name="preview-encoder", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+        print(f"Preview at http://<this pi>:{self.port}/")
+
+    def stop(self):
+        """Stop serving"""
+        with self._lock:
+            self._running = False
+            self._pending.notify_all()
+            self._encoded.notify_all()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        for thread in self._threads:
+            thread.join(timeout=1)
+        self._threads = []
+
+    def publish(self, frame, label=None, roi=None, loop_hz=None, color_order='rgb', lores_size=None):
+        """Offer a frame for the preview, never blocks
+
+        roi is (x, y, w, h) to draw as a box. color_order is 'rgb'
+        (picamera2 main stream), 'bgr' (OpenCV/webcam) or 'yuv420' (lores,
+        give lores_size so stride padding can be cropped off).
+        Returns True if the frame was taken, False if it was dropped.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if not self._running or self.clients == 0 or self._busy \
+                    or now - self._last_publish < self.min_interval:
+                self.dropped += 1
+                return False
+            if self._frame is None or self._frame.shape != frame.shape:
+                self._frame = np.empty_like(frame)
+            np.copyto(self._frame, frame)  # Caller's buffer may be reused right away
+            self._annotations = (label, roi, loop_hz, color_order, lores_size)
+            self._busy = True
+            self._last_publish = now
+            self._pending.notify()
+        return True
+
+    def _encode_loop(self):
+        while True:
+            with self._lock:
+                self._pending.wait_for(lambda: self._busy or not self._running)
+                if not self._running:
+                    return
+                frame, annotations = self._frame, self._annotations
+            jpeg = self._encode(frame, *annotations)
+            with self._lock:
+                self._busy = False
+                if jpeg is not None:
+                    self._jpeg = jpeg
+                    self._jpeg_id += 1
+                    self._encoded.notify_all()
+
+    def _encode(self, frame, label, roi, loop_hz, color_order, lores_size):
+        if color_order == 'yuv420':
+            if lores_size is not None:
+                y, u, v = split_yuv420(frame, lores_size)
+                frame = np.concatenate([y.ravel(), u.ravel(), v.ravel()]).reshape(-1, y.shape[1])
+            image = cv2.cvtColor(frame, cv2.COLOR_YUV2BGR_I420)
+        elif color_order == 'rgb':
+            image = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
+        else:
+            image = frame.copy()
+        if roi is not None:
+            x, y, w, h = roi
+            cv2.rectangle(image, (x, y), (x + w, y + h), (255, 255, 255), 2)
+        text = []
+        if label is not None:
+            text.append(f"Color: {label}")
+        if loop_hz is not None:
+            text.append(f"{loop_hz:.1f} Hz")
+        if text:
+            scale = max(0.4, image.shape[1] / 640)
+            cv2.putText(image, "  ".join(text), (10, int(30 * scale)),
+                        cv2.FONT_HERSHEY_SIMPLEX, scale, (255, 255, 255), 2)
+        ok, jpeg = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+        return jpeg.tobytes() if ok else None
+
+    def _next_jpeg(self, after_id):
+        """Wait for a JPEG newer than after_id, returns (jpeg, id) or (None, id) when stopping"""
+        with self._lock:
+            self._encoded.wait_for(lambda: self._jpeg_id > after_id or not self._running, timeout=5)
+            if not self._running:
+                return None, after_id
+            return self._jpeg, self._jpeg_id
+
+    def _make_handler(self):
+        preview = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path in ("/", "/index.html"):
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/html")
+                    self.send_header("Content-Length", str(len(PAGE)))
+                    self.end_headers()
+                    self.wfile.write(PAGE)
+                elif self.path == "/stream.mjpg":
+                    self._stream()
+                else:
+                    self.send_error(404)
+
+            def _stream(self):
+                self.send_response(200)
+                self.send_header("Cache-Control", "no-cache")
+                self.send_header("Content-Type", "multipart/x-mixed-replace; boundary=FRAME")
+                self.end_headers()
+                with preview._lock:
+                    preview.clients += 1
+                last_id = 0
+                try:
+                    while True:
+                        # A slow client just skips to whatever is newest
+                        jpeg, last_id = preview._next_jpeg(last_id)
+                        if jpeg is None:
+                            if not preview._running:
+                                break
+                            continue
+                        self.wfile.write(b"--FRAME\r\nContent-Type: image/jpeg\r\n")
+                        self.wfile.write(f"Content-Length: {len(jpeg)}\r\n\r\n".encode())
+                        self.wfile.write(jpeg)
+                        self.wfile.write(b"\r\n")
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+                finally:
+                    with preview._lock:
+                        preview.clients -= 1
+
+            def log_message(self, format, *args):
+                pass  # Keep the robot's console for game output
+
+        return Handler
@@ -0,0 +1,128 @@
+import time
+from collections import namedtuple, deque
+from light_grid import GRID_SIZE
+
+# Keep the game loop at a steady rate when the Pi gets slower (thermal
+# throttling, odometry/preview threads busy). Every iteration's vision cost
+# is measured; when the running average no longer fits in the loop period the
+# controller steps down to a cheaper quality level, and once there has been
+# plenty of headroom for a while it steps back up. The loop is paced to the
+# target rate instead of sleeping a fixed 0.1s.
+#
+# Usage:
+#     quality = QualityController(target_hz=10)
+#     while True:
+#         quality.begin()
+#         ... vision with quality.level ...
+#         quality.end()        # measure, maybe change level
+#         ... game logic ...
+#         quality.pace()       # sleep out the rest of the period
+
+TARGET_LOOP_HZ = 10
+DOWNGRADE_AT = 0.9   # Step down when vision uses more than this share of the period
+UPGRADE_AT = 0.4     # Step up when it uses less than this share
+DOWNGRADE_AFTER = 5  # Iterations over budget before stepping down
+UPGRADE_AFTER = 50   # Iterations with headroom before stepping up (slow, avoids flapping)
+COST_ALPHA = 0.2     # Weight of the newest iteration in the running cost
+
+# decimation: look at every n-th ROI pixel in both directions, classifier:
+# vision classifier name, frame_skip: new frames skipped between classified
+# ones, grid: rows x cols for grid mode
+QualityLevel = namedtuple("QualityLevel", "decimation classifier frame_skip grid")
+
+
+def quality_levels(classifier='lut', grid=GRID_SIZE, fallback=None):
+    """Levels for the configured classifier and grid, best first, every step cheaper than the one before
+
+    The grid gets coarser from the third level on. The two cheapest levels
+    switch to fallback (e.g. 'mean') if one is given, otherwise the
+    classifier stays the one configured.
+    """
+    rows, cols = grid
+    medium = (max(1, rows * 2 // 3), max(1, cols * 3 // 4))
+    coarse = (max(1, rows // 2), max(1, cols // 2))
+    cheap = fallback or classifier
+    return (
+        QualityLevel(1, classifier, 0, grid),
+        QualityLevel(2, classifier, 0, grid),
+        QualityLevel(2, classifier, 0, medium),
+        QualityLevel(4, classifier, 1, medium),
+        QualityLevel(4, cheap, 1, coarse),
+        QualityLevel(4, cheap, 2, coarse),
+    )
+
+
+QUALITY_LEVELS = quality_levels()
+
+
+class QualityController:
+    """Picks a QUALITY_LEVELS entry that keeps the loop at target_hz
+
+    level is the current QualityLevel, index its position (0 = best).
+    changes keeps the last level changes as (time, old index, new index,
+    reason) and reason is the latest reason.
+    """
+
+    def __init__(self, target_hz=TARGET_LOOP_HZ, levels=QUALITY_LEVELS, start=0):
+        self.period = 1.0 / target_hz
+        self.levels = levels
+        self.index = start
+        self.cost = None     # Running average vision cost per iteration, seconds
+        self.reason = None
+        self.changes = deque(maxlen=20)
+        self._begin = None
+        self._over = 0
+        self._under = 0
+        self._skipped = 0
+
+    @property
+    def level(self):
+        return self.levels[self.index]
+
+    def begin(self):
+        """Start of an iteration"""
+        self._begin = time.monotonic()
+
+    def skip_frame(self):
+        """True if this new frame should be skipped (frame_skip knob)"""
+        if self._skipped < self.level.frame_skip:
+            self._skipped += 1
+            return True
+        self._skipped = 0
+        return False
+
+    def end(self):
+        """End of the measured (vision) part, returns True if the level changed"""
+        cost = time.monotonic() - self._begin
+        self.cost = cost if self.cost is None else (1 - COST_ALPHA) * self.cost + COST_ALPHA * cost
+        if self.cost > DOWNGRADE_AT * self.period:
+            self._over += 1
+            self._under = 0
+        elif self.cost < UPGRADE_AT * self.period:
+            self._under += 1
+            self._over = 0
+        else:
+            self._over = self._under = 0
+
+        budget = f"{self.cost * 1000:.0f} ms of {self.period * 1000:.0f} ms"
+        if self._over >= DOWNGRADE_AFTER and self.index < len(self.levels) - 1:
+            return self._change(self.index + 1, f"vision took {budget}")
+        if self._under >= UPGRADE_AFTER and self.index > 0:
+            return self._change(self.index - 1, f"vision only took {budget}")
+        return False
+
+    def _change(self, index, reason):
+        self.changes.append((time.monotonic(), self.index, index, reason))
+        self.index = index
+        self.reason = reason
+        self._over = self._under = 0
+        self.cost = None  # Measure the new level from scratch
+        return True
+
+    def pace(self):
+        """Sleep for what is left of the loop period, returns the time slept"""
+        left = self.period - (time.monotonic() - self._begin)
+        if left > 0:
+            time.sleep(left)
+            return left
+        return 0.0
@@ -1,6 +1,9 @@
+import random
+import numpy as np
 from gpiozero import AngularServo
 from time import sleep
-from math import sin, pi
+from motion_scheduler import Timeline, SERVO_COUNT
+from interpolation import interpolate, play_trajectory
 
 # Initialize servos (adjust GPIO pins as needed)
 # Example: servos[0] = GPIO17, servos[1] = GPIO18, etc.
@@ -71,37 +74,38 @@ def spider_walk(servo1_pin1, servo1_pin2,  # Leg 1 (front right)
     # Generate slightly randomized timings for organic movement
     def get_delay(base_delay):
         return max(0.01, base_delay * (1 + random.uniform(-variation, variation)))
-    
-    # Smooth movement with acceleration/deceleration
-    def smooth_move(servo_pin, start_angle, end_angle, steps=5, move_delay=0.05):
-        for i in range(steps + 1):
-            # Sine curve for smooth acceleration/deceleration
-            progress = sin((i/steps) * pi/2)
-            current_angle = start_angle + (end_angle - start_angle) * progress
-            servos[servo_pin].angle = current_angle
-            sleep(move_delay * base_speed)
-    
+
+    # Time the old one-servo-at-a-time smooth_move took for steps + 1 updates
+    def move_time(steps, move_delay):
+        return (steps + 1) * move_delay * base_speed
+
+    def write(row):
+        for pin in np.flatnonzero(~np.isnan(row)):
+            servos[pin].angle = float(row[pin])
+
     def move_tripod(tripod, lift_angles, swing_angles, lower_angles, return_angles):
+        # All legs of the tripod move together, every phase eased in and out
+        lift_pins = [leg[0] for leg in tripod]
+        swing_pins = [leg[1] for leg in tripod]
+        start = np.full(SERVO_COUNT, np.nan)
+        start[lift_pins] = lift_angles[0]
+        start[swing_pins] = swing_angles[0]
+
+        stride = Timeline("stride")
         # Lift legs with intermediate positions
-        for leg in tripod:
-            smooth_move(leg[0], lift_angles[0], lift_angles[1], 3, get_delay(LIFT_SPEED*0.02))
-            smooth_move(leg[0], lift_angles[1], lift_angles[2], 3, get_delay(LIFT_SPEED*0.03))
-        
+        stride.set(lift_pins, lift_angles[1]).wait(move_time(3, get_delay(LIFT_SPEED*0.02)))
+        stride.set(lift_pins, lift_angles[2]).wait(move_time(3, get_delay(LIFT_SPEED*0.03)))
         # Swing legs forward with acceleration
-        for leg in tripod:
-            smooth_move(leg[1], swing_angles[0], swing_angles[1], 3, get_delay(SWING_SPEED*0.015))
-            smooth_move(leg[1], swing_angles[1], swing_angles[2], 3, get_delay(SWING_SPEED*0.025))
-        
+        stride.set(swing_pins, swing_angles[1]).wait(move_time(3, get_delay(SWING_SPEED*0.015)))
+        stride.set(swing_pins, swing_angles[2]).wait(move_time(3, get_delay(SWING_SPEED*0.025)))
         # Lower legs with deceleration
-        for leg in tripod:
-            smooth_move(leg[0], lower_angles[0], lower_angles[1], 2, get_delay(LOWER_SPEED*0.03))
-            smooth_move(leg[0], lower_angles[1], lower_angles[2], 2, get_delay(LOWER_SPEED*0.02))
-        
+        stride.set(lift_pins, lower_angles[1]).wait(move_time(2, get_delay(LOWER_SPEED*0.03)))
+        stride.set(lift_pins, lower_angles[2]).wait(move_time(2, get_delay(LOWER_SPEED*0.02)))
         # Return legs to neutral position
-        for leg in tripod:
-            smooth_move(leg[1], return_angles[0], return_angles[1], 2, get_delay(RETURN_SPEED*0.01))
-            smooth_move(leg[1], return_angles[1], return_angles[2], 1, get_delay(RETURN_SPEED*0.005))
-    
+        stride.set(swing_pins, return_angles[1]).wait(move_time(2, get_delay(RETURN_SPEED*0.01)))
+        stride.set(swing_pins, return_angles[2]).wait(move_time(1, get_delay(RETURN_SPEED*0.005)))
+        play_trajectory(interpolate(stride, start, easing='sine'), write)
+
     # Define movement angles for each phase
     lift_angles = (0, 45, 90)      # Start, intermediate, end
     swing_angles = (0, 45, 90)
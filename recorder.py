@@ -0,0 +1,208 @@
+import os
+import sys
+import time
+import json
+import argparse
+import numpy as np
+from capture import wait_for_convergence
+
+# Record camera frames into a preallocated memory-mapped .npy file and play
+# them back later through the same capture_array() call the scripts use, so
+# competition-day lighting can be replayed into the vision code and benchmarks
+# without the camera.
+#
+# A recording is up to three files:
+#   name.npy             N x frame shape, frames as captured (RGBX/YUV from
+#                        picamera2, BGR from a webcam)
+#   name.timestamps.npy  N int64 capture times in ns, -1 for unused slots
+#   name.meta.json       color_order ('rgb', 'bgr' or 'yuv420') and frame_size
+#                        (width, height), so readers know what the frames hold
+#
+# Usage: python3 recorder.py day1.npy --frames 900 [--source webcam]
+
+
+def timestamps_path(path):
+    """Sidecar timestamp index for a recording"""
+    return os.path.splitext(path)[0] + ".timestamps.npy"
+
+
+def metadata_path(path):
+    """Sidecar metadata for a recording"""
+    return os.path.splitext(path)[0] + ".meta.json"
+
+
+def read_metadata(path):
+    """A recording's metadata, empty for recordings made without it"""
+    try:
+        with open(metadata_path(path)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+class FrameRecorder:
+    """Writes frames into a preallocated memory-mapped recording
+
+    color_order says what the frames hold ('rgb' for picamera2 RGB(X), 'bgr'
+    for webcams, 'yuv420' for lores frames) and is saved with the frame
+    size in the metadata sidecar. frame_size defaults to the width and
+    height of frame_shape; pass it for YUV420, whose arrays are 1.5x taller.
+    """
+
+    def __init__(self, path, frame_shape, dtype=np.uint8, max_frames=900, color_order=None,
+                 frame_size=None):
+        self.path = path
+        self.frames = np.lib.format.open_memmap(
+            path, mode='w+', dtype=dtype, shape=(max_frames,) + tuple(frame_shape))
+        self.timestamps = np.lib.format.open_memmap(
+            timestamps_path(path), mode='w+', dtype=np.int64, shape=(max_frames,))
+        self.timestamps[:] = -1
+        self.count = 0
+        if color_order is not None:
+            if frame_size is None:
+                frame_size = (frame_shape[1], frame_shape[0])
+            with open(metadata_path(path), 'w') as f:
+                json.dump({"color_order": color_order, "frame_size": list(frame_size)}, f)
+
+    def full(self):
+        return self.count >= len(self.frames)
+
+    def record(self, frame, timestamp=None):
+        """Store one frame, returns False once the recording is full"""
+        if self.full():
+            return False
+        self.frames[self.count] = frame
+        self.timestamps[self.count] = time.monotonic_ns() if timestamp is None else timestamp
+        self.count += 1
+        return True
+
+    def close(self):
+        """Flush everything to disk"""
+        self.frames.flush()
+        self.timestamps.flush()
+        del self.frames, self.timestamps
+
+
+class ReplaySource:
+    """Plays a recording back through capture_array()
+
+    Frames are views into the memory map, nothing is copied. pacing
+    'realtime' waits so frames come out with their recorded spacing, 'fast'
+    returns them as fast as they're asked for. Returns None at the end unless
+    loop is set.
+    """
+
+    def __init__(self, path, pacing='realtime', loop=False):
+        if pacing not in ('realtime', 'fast'):
+            raise ValueError(f"Unknown pacing '{pacing}', use 'realtime' or 'fast'")
+        self.frames = np.load(path, mmap_mode='r')
+        self.timestamps = np.load(timestamps_path(path), mmap_mode='r')
+        self.color_order = read_metadata(path).get("color_order")  # None for old recordings
+        unused = np.flatnonzero(self.timestamps < 0)
+        self.count = int(unused[0]) if len(unused) else len(self.timestamps)
+        self.pacing = pacing
+        self.loop = loop
+        self.index = 0
+        self.last_timestamp = None
+        self._start = None
+
+    def __len__(self):
+        return self.count
+
+    def capture_array(self, name=None):
+        """Next recorded frame (a read-only view), or None when the recording is over"""
+        if self.index >= self.count:
+            if not self.loop or self.count == 0:
+                return None
+            self.index = 0
+            self._start = None
+
+        recorded = int(self.timestamps[self.index])
+        if self.pacing == 'realtime':
+            now = time.monotonic_ns()
+            if self._start is None:
+                self._start = (now, recorded)
+            due = self._start[0] + (recorded - self._start[1])
+            if due > now:
+                time.sleep((due - now) / 1e9)
+
+        frame = self.frames[self.index]
+        self.last_timestamp = recorded
+        self.index += 1
+        return frame
+
+    def rewind(self):
+        self.index = 0
+        self._start = None
+
+
+def record_picamera(path, max_frames, stream="main"):
+    """Record from the Pi camera with the usual 640x480 preview configuration (RGBX frames)"""
+    from picamera2 import Picamera2
+
+    picam2 = Picamera2()
+    config = picam2.create_preview_configuration(main={"size": (640, 480)})
+    picam2.configure(config)
+    picam2.start()
+    wait_for_convergence(picam2)  # Camera warm-up
+    recorder = None
+    try:
+        while recorder is None or not recorder.full():
+            request = picam2.capture_request()
+            try:
+                frame = request.make_array(stream)
+                timestamp = request.get_metadata().get("SensorTimestamp")
+            finally:
+                request.release()
+            if recorder is None:
+                recorder = FrameRecorder(path, frame.shape, frame.dtype, max_frames, color_order='rgb')
+            recorder.record(frame, timestamp)
+    except KeyboardInterrupt:
+        print("\nRecording stopped by user")
+    finally:
+        picam2.stop()
+        if recorder is not None:
+            print(f"Recorded {recorder.count} frames to {path}")
+            recorder.close()
+
+
+def record_webcam(path, max_frames, device=0):
+    """Record from a webcam through cv2.VideoCapture"""
+    import cv2
+
+    cap = cv2.VideoCapture(device)
+    recorder = None
+    try:
+        while recorder is None or not recorder.full():
+            ret, frame = cap.read()
+            if not ret:
+                break
+            if recorder is None:
+                recorder = FrameRecorder(path, frame.shape, frame.dtype, max_frames, color_order='bgr')
+            recorder.record(frame)
+    except KeyboardInterrupt:
+        print("\nRecording stopped by user")
+    finally:
+        cap.release()
+        if recorder is not None:
+            print(f"Recorded {recorder.count} frames to {path}")
+            recorder.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Record camera frames to a memory-mapped file")
+    parser.add_argument("path", help="output .npy file")
+    parser.add_argument("--frames", type=int, default=900, help="frames to record (preallocated)")
+    parser.add_argument("--source", choices=("picamera", "webcam"), default="picamera")
+    parser.add_argument("--device", type=int, default=0, help="webcam device number")
+    args = parser.parse_args(argv)
+
+    if args.source == "webcam":
+        record_webcam(args.path, args.frames, args.device)
+    else:
+        record_picamera(args.path, args.frames)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,60 @@
+import cv2
+import numpy as np
+from color_engine import MIN_SATURATION, MIN_VALUE
+from capture import VISION_ROI
+
+# Lock the ROI onto the light screen. The screen is a big evenly colored
+# rectangle, so a downscaled saturation mask plus connected components finds
+# it. After that only the tight box around it is classified, until the
+# classifier's confidence drops and the full search runs again.
+
+
+class ScreenTracker:
+    """Finds the colored screen in a frame and keeps cropping to it"""
+
+    def __init__(self, search_width=160, min_area=0.01, inset=0.1,
+                 min_confidence=0.6, color_order='rgb', fallback_roi=VISION_ROI):
+        self.search_width = search_width    # Width the frame is shrunk to for the search
+        self.min_area = min_area            # Smallest blob, as a share of the frame
+        self.inset = inset                  # Share of the box trimmed off each side
+        self.min_confidence = min_confidence
+        self.color_order = color_order      # 'rgb' (picamera2) or 'bgr' (webcam/OpenCV)
+        self.fallback_roi = fallback_roi
+        self.box = None
+        self.searches = 0
+
+    def find_screen(self, image):
+        """Search the whole frame for the largest saturated blob, returns (x, y, w, h) or None"""
+        self.searches += 1
+        height, width = image.shape[:2]
+        scale = self.search_width / width
+        small = cv2.resize(image, (self.search_width, max(1, int(height * scale))),
+                           interpolation=cv2.INTER_AREA)
+        code = cv2.COLOR_RGB2HSV if self.color_order == 'rgb' else cv2.COLOR_BGR2HSV
+        hsv = cv2.cvtColor(small, code)
+        mask = ((hsv[..., 1] >= MIN_SATURATION) & (hsv[..., 2] >= MIN_VALUE)).astype(np.uint8)
+        count, _, stats, _ = cv2.connectedComponentsWithStats(mask, connectivity=4)
+        if count < 2:
+            return None
+        best = 1 + int(stats[1:, cv2.CC_STAT_AREA].argmax())  # Component 0 is background
+        if stats[best, cv2.CC_STAT_AREA] < self.min_area * mask.size:
+            return None
+
+        x, y, w, h = stats[best, :4]
+        dx, dy = int(w * self.inset), int(h * self.inset)
+        x, y, w, h = x + dx, y + dy, w - 2 * dx, h - 2 * dy
+        if w <= 0 or h <= 0:
+            return None
+        return (int(x / scale), int(y / scale), max(1, int(w / scale)), max(1, int(h / scale)))
+
+    def roi(self, image):
+        """View of the frame to classify: the tracked screen, or the fallback window"""
+        if self.box is None:
+            self.box = self.find_screen(image)
+        x, y, w, h = self.box if self.box is not None else self.fallback_roi
+        return image[y:y + h, x:x + w]
+
+    def report(self, confidence):
+        """Feed back the classifier's confidence, drops the lock when it is too low"""
+        if confidence < self.min_confidence:
+            self.box = None
@@ -0,0 +1,73 @@
+import time
+import threading
+import numpy as np
+
+# All twelve servos as one bank. write() takes a whole 12-vector of target
+# angles, adds the calibration offsets and clamps in one go, and only sends
+# the channels that actually change by more than the servo deadband (a "back
+# to neutral" phase that finds most legs at 90 already only touches the
+# rest). The remaining writes go out back to back and share one timestamp, so
+# a phase change reaches every leg at practically the same moment.
+
+SERVO_DEADBAND = 1.0  # Degrees; smaller changes than this don't move a hobby servo anyway
+
+
+class ServoBank:
+    """Dirty-checked writes to a list of AngularServos
+
+    offsets is the calibration offset list; it is read on every write, so
+    changes made during calibration apply right away. NaN in a target
+    vector leaves that servo alone. commanded holds the last angle sent to
+    each servo (NaN until the first write), last_write the monotonic time
+    of the last batch.
+    """
+
+    def __init__(self, servos, offsets, deadband=SERVO_DEADBAND, min_angle=0, max_angle=180):
+        self.servos = servos
+        self.offsets = offsets
+        self.deadband = deadband
+        self.min_angle = min_angle
+        self.max_angle = max_angle
+        self.commanded = np.full(len(servos), np.nan)
+        self.last_write = None
+        self.writes = 0    # Channel writes sent
+        self.skipped = 0   # Channel writes saved by the dirty check
+        self._lock = threading.Lock()
+
+    def write(self, targets, force=False):
+        """Send a vector of target angles (before offsets), returns the number of servos written
+
+        force=True writes every channel with a target, e.g. to make sure the
+        servos really are where commanded says after startup.
+        """
+        targets = np.asarray(targets, dtype=np.float64)
+        wanted = ~np.isnan(targets)
+        angles = np.clip(targets + np.asarray(self.offsets, dtype=np.float64), self.min_angle, self.max_angle)
+        with self._lock:
+            if force:
+                changed = wanted
+            else:
+                # NaN commanded (never written) compares False, so check it explicitly
+                changed = wanted & (np.isnan(self.commanded) |
+                                    (np.abs(angles - self.commanded) >= self.deadband))
+            channels = np.flatnonzero(changed)
+            self.skipped += int(wanted.sum()) - len(channels)
+            if len(channels) == 0:
+                return 0
+            self.last_write = time.monotonic()
+            for i, angle in zip(channels.tolist(), angles[channels].tolist()):
+                self.servos[i].angle = angle
+            self.commanded[channels] = angles[channels]
+            self.writes += len(channels)
+        return len(channels)
+
+    def set(self, index, angle, force=False):
+        """Set one servo (or a list of them) to angle"""
+        targets = np.full(len(self.servos), np.nan)
+        targets[index] = angle
+        return self.write(targets, force)
+
+    def angles(self):
+        """Last commanded angles without the offsets (NaN for servos never written)"""
+        with self._lock:
+            return self.commanded - np.asarray(self.offsets, dtype=np.float64)
@@ -0,0 +1,97 @@
+from collections import deque
+import cv2
+import numpy as np
+from color_engine import COLOR_LABELS
+
+# Smooth the per-frame color label over time so one bad frame can't kill the
+# spider or change its speed. Every update is O(1): a running (exponentially
+# weighted) score per label and RGB color updated in place, plus a fixed-size
+# vote window with running counts.
+
+FILTER_ALPHA = 0.3   # Weight of the newest frame in the running averages
+VOTE_WINDOW = 5      # Frames in the vote window
+SWITCH_VOTES = 3     # Votes a new label needs in the window before we switch
+
+
+class ColorFilter:
+    """Debounces color labels with a vote window and per-label hysteresis
+
+    switch_votes is either one number for every label or a dict of label ->
+    votes (labels not in it use SWITCH_VOTES), e.g. {"Blue": 5} to make the
+    game-over color extra hard to trigger. Lower values react faster, higher
+    values give fewer false triggers.
+    """
+
+    def __init__(self, alpha=FILTER_ALPHA, window=VOTE_WINDOW, switch_votes=SWITCH_VOTES,
+                 min_confidence=0.0):
+        if isinstance(switch_votes, dict):
+            votes = [switch_votes.get(name, SWITCH_VOTES) for name in COLOR_LABELS]
+        else:
+            votes = [switch_votes] * len(COLOR_LABELS)
+        if max(votes) > window:
+            raise ValueError(f"switch_votes can't be more than the window ({window})")
+        self.alpha = alpha
+        self.min_confidence = min_confidence
+        self.switch_votes = np.array(votes)
+        self.window = deque(maxlen=window)
+        self.counts = np.zeros(len(COLOR_LABELS), dtype=np.int32)
+        self.scores = np.zeros(len(COLOR_LABELS), dtype=np.float32)  # Running evidence per label
+        self.running_rgb = np.zeros((1, 3), dtype=np.float32)  # Running color, if update() is given RGB
+        self.label = None  # Filtered label, None until the first label has enough votes
+        self.frames_to_switch = 0  # Frames the last switch took since the old label was first contradicted
+        self._pending_since = None  # Frames since the current label was first contradicted
+        self._rgb = np.zeros((1, 3), dtype=np.float32)  # Scratch for accumulateWeighted
+        self._has_rgb = False
+
+    def update(self, label, confidence=1.0, rgb=None):
+        """Feed one frame's label (and optionally its RGB color), returns the filtered label
+
+        Frames below min_confidence still age the running averages but don't
+        vote. label may be None for a frame with nothing to classify.
+        """
+        self.scores *= 1 - self.alpha
+        if rgb is not None:
+            self._rgb[0] = rgb[:3]
+            if self._has_rgb:
+                cv2.accumulateWeighted(self._rgb, self.running_rgb, self.alpha)
+            else:
+                self.running_rgb[:] = self._rgb
+                self._has_rgb = True
+
+        if label is None or label not in COLOR_LABELS or confidence < self.min_confidence:
+            return self.label
+        index = COLOR_LABELS.index(label)
+        self.scores[index] += self.alpha * confidence
+
+        if len(self.window) == self.window.maxlen:
+            self.counts[self.window[0]] -= 1
+        self.window.append(index)
+        self.counts[index] += 1
+
+        if label != self.label and self._pending_since is None:
+            self._pending_since = 0
+        if self._pending_since is None:
+            return self.label
+        self._pending_since += 1
+        if label != self.label and self.counts[index] >= self.switch_votes[index]:
+            self.label = label
+            self.frames_to_switch = self._pending_since
+            self._pending_since = None
+        elif self.label is not None and self.counts[COLOR_LABELS.index(self.label)] == len(self.window):
+            self._pending_since = None  # Every contradicting vote has left the window
+        return self.label
+
+    @property
+    def color(self):
+        """Running RGB color as a tuple, None before update() was given any"""
+        return tuple(self.running_rgb[0].tolist()) if self._has_rgb else None
+
+    def reset(self):
+        """Forget everything (e.g. after the spider moved to a new spot)"""
+        self.window.clear()
+        self.counts[:] = 0
+        self.scores[:] = 0
+        self.running_rgb[:] = 0
+        self._has_rgb = False
+        self.label = None
+        self._pending_since = None
@@ -0,0 +1,25 @@
+import numpy as np
+from recorder import FrameRecorder
+from offline_vision import make_classifiers
+from bench_vision import load_frame_file, run_benchmark
+
+
+def test_bench_on_picamera_recording(tmp_path):
+    """Full 640x480 RGBX frames as record_picamera stores them, red inside the vision ROI only"""
+    path = str(tmp_path / "red.npy")
+    frame = np.zeros((480, 640, 4), np.uint8)
+    frame[..., :3] = (30, 30, 200)  # Blue around the ROI
+    frame[100:400, 200:500, :3] = (230, 20, 20)
+    frame[..., 3] = 255
+    recorder = FrameRecorder(path, frame.shape, frame.dtype, max_frames=4, color_order='rgb')
+    for _ in range(3):
+        recorder.record(frame)
+    recorder.close()
+    with open(tmp_path / "red.labels.txt", "w") as f:
+        f.write("Red\n" * 3)
+
+    frames, labels = load_frame_file(path)
+    assert len(frames) == 3
+    assert frames[0].shape == (300, 300, 3)
+    results = run_benchmark(frames, labels, make_classifiers())
+    assert {r['name']: r['accuracy'] for r in results} == {r['name']: 1.0 for r in results}
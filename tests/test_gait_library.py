@@ -0,0 +1,33 @@
+import importlib.util
+import numpy as np
+from gait_library import load_gait_library
+
+GAIT_SOURCE = '''
+from motion_scheduler import Timeline
+
+
+def lift(speed=1.0):
+    return Timeline("lift").set([1, 3], {angle}).wait(0.1 * speed).set([1, 3], 90).wait(0.1 * speed)
+'''
+
+
+def import_gaits(path, angle):
+    path.write_text(GAIT_SOURCE.format(angle=angle))
+    spec = importlib.util.spec_from_file_location("edited_gaits", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return {"lift": module.lift}
+
+
+def test_edited_gait_is_rebuilt(tmp_path):
+    library_path = str(tmp_path / "gaits.npz")
+    source = tmp_path / "edited_gaits.py"
+
+    library = load_gait_library(library_path, import_gaits(source, 120))
+    assert library.gait("lift").angles[0, 1] == 120
+    assert load_gait_library(library_path, import_gaits(source, 120)).key == library.key
+
+    edited = load_gait_library(library_path, import_gaits(source, 140))
+    assert edited.key != library.key
+    assert edited.gait("lift").angles[0, 1] == 140
+    assert np.isnan(edited.gait("lift").angles[0, 0])
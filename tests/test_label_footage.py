@@ -0,0 +1,41 @@
+import cv2
+import numpy as np
+from color_engine import COLOR_LABELS
+from recorder import FrameRecorder
+from offline_vision import make_classifiers
+from label_footage import label_footage
+
+
+def test_labels_rgbx_dump(tmp_path):
+    """A plain 4-channel picamera2 dump (no recorder metadata) labelled with --rgb"""
+    source = str(tmp_path / "red.npy")
+    output = str(tmp_path / "red.labels.npz")
+    frames = np.zeros((4, 480, 640, 4), np.uint8)
+    frames[..., :3] = (230, 20, 20)
+    frames[..., 3] = 255
+    np.save(source, frames)
+
+    names = list(make_classifiers())
+    assert label_footage(source, output, names, jobs=1, rgb=True) == 4
+    data = np.load(output)
+    for name in names:
+        assert [COLOR_LABELS[i] for i in data[f"{name}_label"]] == ["Red"] * 4, name
+
+
+def test_labels_yuv420_recording(tmp_path):
+    """Lores YUV420 frames as record_picamera stores them, with recorder metadata"""
+    source = str(tmp_path / "green.npy")
+    output = str(tmp_path / "green.labels.npz")
+    bgr = np.full((128, 128, 3), (40, 170, 30), np.uint8)
+    frame = cv2.cvtColor(bgr, cv2.COLOR_BGR2YUV_I420)
+    recorder = FrameRecorder(source, frame.shape, frame.dtype, max_frames=3, color_order='yuv420',
+                             frame_size=(128, 128))
+    for _ in range(3):
+        recorder.record(frame)
+    recorder.close()
+
+    names = list(make_classifiers())
+    assert label_footage(source, output, names, jobs=1) == 3
+    data = np.load(output)
+    for name in names:
+        assert [COLOR_LABELS[i] for i in data[f"{name}_label"]] == ["Green"] * 3, name
@@ -0,0 +1,16 @@
+import numpy as np
+import pytest
+from leg_ik import ik_tripod_timeline, feet_timeline, standing_feet
+
+
+def test_every_leg_swings_over_a_cycle():
+    angles = ik_tripod_timeline().angles
+    hips = angles[:, 0::2]
+    assert np.all(np.ptp(hips, axis=0) > 10)
+
+
+def test_unreachable_foot_raises():
+    feet = standing_feet()
+    feet[0, 1] += 40  # Straight out from the front hip, further than the leg reaches
+    with pytest.raises(ValueError, match=r"legs \[0\]"):
+        feet_timeline("bad", [(feet, 0.1)])
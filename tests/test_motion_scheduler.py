@@ -0,0 +1,18 @@
+import pytest
+from motion_scheduler import MotionScheduler, Timeline
+
+
+def test_failed_write_is_raised_on_the_caller():
+    def write(angles):
+        raise OSError("servo write failed")
+
+    motion = MotionScheduler(write)
+    motion.start()
+    motion.enqueue(Timeline("walk").set(0, 120).wait(0.05))
+    with pytest.raises(RuntimeError) as error:
+        motion.wait(timeout=1)
+    assert isinstance(error.value.__cause__, OSError)
+    assert motion.current is None
+    with pytest.raises(RuntimeError):
+        motion.busy()
+    motion.stop()
@@ -0,0 +1,22 @@
+import numpy as np
+from color_engine import COLOR_LABELS
+from temporal_filter import ColorFilter
+
+
+def test_frames_to_switch_counts_from_first_contradiction():
+    color_filter = ColorFilter(window=5, switch_votes=3)
+    for _ in range(5):
+        color_filter.update("Green")
+    # Red wins its third vote on the fifth frame after it first showed up
+    for label in ("Red", "Green", "Red", "Green", "Red"):
+        color_filter.update(label)
+    assert color_filter.label == "Red"
+    assert color_filter.frames_to_switch == 5
+
+
+def test_running_color_is_exponentially_weighted():
+    color_filter = ColorFilter(alpha=0.5)
+    color_filter.update("Red", rgb=(200, 0, 0))
+    color_filter.update("Red", rgb=(100, 40, 0))
+    assert np.allclose(color_filter.color, (150, 20, 0))
+    assert COLOR_LABELS[color_filter.scores.argmax()] == "Red"
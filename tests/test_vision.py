@@ -0,0 +1,28 @@
+import numpy as np
+from vision import detect_frame_color
+from frame_buffers import BufferPool
+
+
+def rgbx_frame(rgb, size=(480, 640)):
+    """Solid Picamera2 XBGR8888 preview frame: bytes R, G, B, X"""
+    frame = np.full(size + (4,), 255, np.uint8)
+    frame[..., :3] = rgb
+    return frame
+
+
+def test_grid_path_reads_rgbx_frames():
+    name, fraction = detect_frame_color(rgbx_frame((230, 20, 20)), profile='preview', grid=(6, 8))
+    assert name == "Red"
+    assert fraction > 0.9
+    name, _ = detect_frame_color(rgbx_frame((20, 200, 40)), profile='preview', grid=(6, 8))
+    assert name == "Green"
+
+
+def test_rgbx_roi_path_reuses_buffers():
+    pool = BufferPool()
+    frame = rgbx_frame((230, 20, 20))
+    assert detect_frame_color(frame, profile='preview', pool=pool)[0] == "Red"
+    allocations = pool.allocations
+    for _ in range(3):
+        assert detect_frame_color(frame, profile='preview', pool=pool)[0] == "Red"
+    assert pool.allocations == allocations
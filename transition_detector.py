@@ -0,0 +1,124 @@
+import numpy as np
+
+# Catch the red/green switch while the screen is still fading. The light pages
+# animate background-color (0.5s in "The screen", 0.3s in
+# red_light_green_light2), and the browser interpolates in RGB, so red -> green
+# passes through orange and yellow: the hue climbs steadily from 0 to 120
+# degrees (and falls back for green -> red). The labels only change once the
+# hue crosses a threshold, late in the fade. Here we follow the hue of the
+# screen's mean color frame by frame and fire as soon as it has moved clearly
+# and consistently away from the current color toward the other one.
+#
+# Hue is in degrees with red at 0 and green at 120; everything past 240 is
+# taken as negative (magenta is just below red) so the red <-> green path
+# never wraps.
+
+TRANSITION_HUES = {"Red": 0.0, "Green": 120.0}
+SETTLE_DEGREES = 30       # Hue within this of red/green counts as that color
+TREND_DEGREES = 15        # Hue movement away from the settled color before we fire
+TREND_FRAMES = 2          # Consecutive frames that must move toward the other color
+MIN_TREND_SATURATION = 0.25  # Grayer than this says nothing about the hue (screen off, glare)
+ANCHOR_ALPHA = 0.3        # How fast the settled hue follows slow drift (auto white balance)
+
+
+def hue_saturation(rgb):
+    """Hue (degrees, -120..240 with red at 0) and HSV saturation (0..1) of an RGB color"""
+    r, g, b = (float(c) for c in rgb[:3])
+    high, low = max(r, g, b), min(r, g, b)
+    if high <= 0 or high == low:
+        return 0.0, 0.0
+    span = high - low
+    if high == r:
+        hue = 60.0 * (g - b) / span
+    elif high == g:
+        hue = 60.0 * (b - r) / span + 120.0
+    else:
+        hue = 60.0 * (r - g) / span + 240.0
+    hue %= 360.0
+    if hue > 240.0:
+        hue -= 360.0
+    return hue, span / high
+
+
+class TransitionDetector:
+    """Fires "Red" or "Green" early, while the screen fades toward that color
+
+    Feed it the screen's mean RGB color every frame. update() returns the
+    color being switched to on the one frame the trend becomes clear and
+    None otherwise. A fade that turns back before reaching the other color
+    re-arms the detector (false_alarms counts those).
+    """
+
+    def __init__(self, trend_degrees=TREND_DEGREES, trend_frames=TREND_FRAMES,
+                 settle_degrees=SETTLE_DEGREES, min_saturation=MIN_TREND_SATURATION):
+        self.trend_degrees = trend_degrees
+        self.trend_frames = trend_frames
+        self.settle_degrees = settle_degrees
+        self.min_saturation = min_saturation
+        self.settled = None     # "Red"/"Green" the screen is showing (or fading away from)
+        self.fired = None       # Color we already announced for the current fade
+        self.progress = 0.0     # 0 (settled) .. 1 (at the other color)
+        self.false_alarms = 0
+        self._anchor = None     # Hue of the settled color as the camera sees it
+        self._last_hue = None
+        self._run = 0           # Consecutive frames moving toward the other color
+
+    def _near(self, hue):
+        for name, target in TRANSITION_HUES.items():
+            if abs(hue - target) <= self.settle_degrees:
+                return name
+        return None
+
+    def update(self, rgb):
+        """Feed one frame's mean RGB color, returns the color being switched to or None"""
+        hue, saturation = hue_saturation(rgb)
+        if saturation < self.min_saturation:
+            self._last_hue = None
+            self._run = 0
+            return None
+
+        near = self._near(hue)
+        if self.settled is None:
+            if near is not None:
+                self.settled, self._anchor = near, hue
+            self._last_hue = hue
+            return None
+
+        target = "Green" if self.settled == "Red" else "Red"
+        direction = np.sign(TRANSITION_HUES[target] - TRANSITION_HUES[self.settled])
+        moved = (hue - self._anchor) * direction
+        step = (hue - self._last_hue) * direction if self._last_hue is not None else 0.0
+        self._last_hue = hue
+        self.progress = float(np.clip(moved / max(abs(TRANSITION_HUES[target] - self._anchor), 1.0), 0, 1))
+
+        if near == target:
+            # Fade finished (or jumped straight there), start watching the way back
+            self.settled, self._anchor = target, hue
+            self.fired = None
+            self._run = 0
+            self.progress = 0.0
+            return None
+
+        if near == self.settled and moved < self.trend_degrees:
+            # Still resting on the settled color, follow slow drift
+            self._anchor += ANCHOR_ALPHA * (hue - self._anchor)
+            self._run = 0
+            if self.fired is not None:
+                self.fired = None  # Turned back before getting there
+                self.false_alarms += 1
+            return None
+
+        self._run = self._run + 1 if step > 0 else 0
+        if self.fired is None and self._run >= self.trend_frames and moved >= self.trend_degrees:
+            self.fired = target
+            return target
+        return None
+
+    def reset(self):
+        """Forget the settled color (e.g. after the spider turned away from the screen)"""
+        self.settled = None
+        self.fired = None
+        self.progress = 0.0
+        self._anchor = None
+        self._last_hue = None
+        self._run = 0
@@ -0,0 +1,130 @@
+import cv2
+import numpy as np
+from color_engine import get_dominant_color, classify_color
+from color_lut import classify_roi, classify_yuv_planes, label_pixels, label_yuv_planes
+from capture import split_yuv420, LORES_SIZE, VISION_ROI
+from light_grid import locate_light, GRID_SIZE
+from frame_buffers import BufferPool
+
+# Frame -> color label for the game loop. Nothing in here touches the camera
+# or the servos, so it can run in the vision worker process or on recorded
+# frames just as well as in the main loop.
+#
+# All conversions write into preallocated buffers from a BufferPool, so a
+# steady stream of same-sized frames allocates next to nothing. The default
+# pool belongs to whichever thread runs vision (the game loop, or the vision
+# worker process, which gets its own copy when forked); pass your own pool
+# when calling from another thread.
+
+YUV_PROFILES = ('lores', 'game')  # Profiles that deliver YUV420 lores frames
+BGR_PROFILES = ('webcam',)  # Profiles that deliver BGR frames (cv2.VideoCapture), the rest are RGB
+
+_pool = BufferPool()
+
+
+def rgb_to_bgr(image, pool, name):
+    """RGB or RGBX (Picamera2 XBGR8888) frame -> BGR in the pooled buffer called name"""
+    code = cv2.COLOR_RGBA2BGR if image.shape[2] == 4 else cv2.COLOR_RGB2BGR
+    return cv2.cvtColor(image, code, dst=pool.get(name, image.shape[:2] + (3,)))
+
+
+def detect_color(roi, classifier='lut', pool=None):
+    """Classify a BGR ROI, returns (color name, confidence)
+
+    classifier 'lut' votes per pixel, 'dominant' runs get_dominant_color and
+    classify_color (confidence is always 1.0 then), 'mean' does the same
+    with the cheap mean engine whatever engine is selected.
+    """
+    pool = pool or _pool
+    if classifier == 'lut':
+        return classify_roi(roi, pool=pool)
+    engine = 'mean' if classifier == 'mean' else None
+    dominant_color = get_dominant_color(roi, engine, pool=pool)
+    return classify_color(dominant_color), 1.0
+
+
+def detect_tracked_color(image, tracker, classifier='lut', pool=None):
+    """Classify the screen a roi_tracker.ScreenTracker has locked onto in an RGB preview frame
+
+    Returns (color name, confidence) and feeds the confidence back to the
+    tracker, so it searches again once the screen is lost.
+    """
+    pool = pool or _pool
+    roi = tracker.roi(image)
+    if roi.size == 0:
+        tracker.report(0.0)
+        return None, 0.0
+    bgr = rgb_to_bgr(roi, pool, "tracked_bgr")
+    name, confidence = detect_color(bgr, classifier, pool)
+    tracker.report(confidence if name != "None" else 0.0)
+    return name, confidence
+
+
+def detect_frame_light(image, profile='lores', grid=GRID_SIZE, lores_size=LORES_SIZE, pool=None, step=1):
+    """Locate the light anywhere in a captured frame, returns a light_grid.LightLocation
+
+    The whole frame is labelled (lores: at chroma resolution, preview and
+    webcam: every other pixel, step: only every step-th of those) and
+    classified tile by tile.
+    """
+    pool = pool or _pool
+    if profile in YUV_PROFILES:
+        y, u, v = split_yuv420(image, lores_size)
+        labels = label_yuv_planes(y[::step, ::step], u[::step, ::step], v[::step, ::step], pool=pool)
+    elif profile in BGR_PROFILES:
+        labels = label_pixels(image[::2 * step, ::2 * step], pool=pool)
+    else:
+        labels = label_pixels(image[::2 * step, ::2 * step, 2::-1], pool=pool)  # RGB(X) -> BGR as a view
+    return locate_light(labels, grid, pool=pool)
+
+
+def detect_frame_color(image, profile='lores', classifier='lut', grid=None, lores_size=LORES_SIZE,
+                       pool=None, step=1):
+    """Classify a captured frame for the given vision profile, returns (color name, confidence)
+
+    The color name is None when the frame has nothing to classify. With a
+    grid (rows, cols) the light is searched for in the whole frame and the
+    confidence is the share of the frame it covers. step > 1 only looks at
+    every step-th pixel of the ROI in both directions.
+    """
+    pool = pool or _pool
+    if grid is not None:
+        light = detect_frame_light(image, profile, grid, lores_size, pool, step)
+        return light.label, light.fraction
+
+    if profile in YUV_PROFILES:
+        # Frame is already cropped to the ROI by the ISP
+        y, u, v = split_yuv420(image, lores_size)
+        y, u, v = y[::step, ::step], u[::step, ::step], v[::step, ::step]
+        if classifier == 'lut':
+            return classify_yuv_planes(y, u, v, pool=pool)
+        ycrcb = pool.get("ycrcb", u.shape + (3,))  # Filled plane by plane, decimated planes are strided
+        np.copyto(ycrcb[..., 0], y[:2 * u.shape[0]:2, :2 * u.shape[1]:2])
+        np.copyto(ycrcb[..., 1], v)
+        np.copyto(ycrcb[..., 2], u)
+        bgr = cv2.cvtColor(ycrcb, cv2.COLOR_YCrCb2BGR, dst=pool.get("lores_bgr", u.shape + (3,)))
+        return detect_color(bgr, classifier, pool)
+
+    # The ROI is a view into the converted frame, no copy
+    if profile not in BGR_PROFILES:
+        image = rgb_to_bgr(image, pool, "frame_bgr")
+    x, y, w, h = VISION_ROI
+    roi = image[y:y + h:step, x:x + w:step]
+    if roi.size == 0:
+        return None, 0.0
+    return detect_color(roi, classifier, pool)
+
+
+def frame_mean_color(image, profile='lores', lores_size=LORES_SIZE):
+    """Mean RGB color of the vision ROI in a captured frame (for transition_detector)
+
+    Lores frames are already cropped to the ROI, the mean luma and chroma are
+    converted with the full-range YCbCr formulas.
+    """
+    if profile in YUV_PROFILES:
+        y, u, v = split_yuv420(image, lores_size)
+        luma, cb, cr = cv2.mean(y)[0], cv2.mean(u)[0] - 128, cv2.mean(v)[0] - 128
+        return (luma + 1.402 * cr, luma - 0.344136 * cb - 0.714136 * cr, luma + 1.772 * cb)
+    x, y, w, h = VISION_ROI
+    mean = cv2.mean(image[y:y + h, x:x + w])
+    return mean[2::-1] if profile in BGR_PROFILES else mean[:3]
@@ -0,0 +1,148 @@
+import time
+import multiprocessing
+from multiprocessing import shared_memory
+import numpy as np
+from color_engine import COLOR_LABELS
+
+# Runs color classification in a separate process so it can use another core
+# and never holds the GIL the servo code needs. Frames go over a small ring of
+# shared memory slots (copied in, never pickled) and results come back in a
+# shared struct.
+
+# Header shared by both processes: which slot holds the newest frame, its id
+# and timestamp, and which slot the worker is reading right now (-1 if none).
+HEADER_LATEST_SLOT, HEADER_FRAME_ID, HEADER_TIMESTAMP, HEADER_READING_SLOT = range(4)
+
+RESULT_DTYPE = np.dtype([
+    ('frame_id', np.int64),
+    ('timestamp', np.int64),
+    ('label', np.int32),        # Index into COLOR_LABELS, -1 for no result
+    ('confidence', np.float32),
+    ('latency', np.float64),    # Seconds spent classifying
+])
+
+
+def _worker_loop(classify, frames_shm, header_shm, results_shm, shape, dtype,
+                 lock, new_frame, running):
+    """Entry point of the worker process (the shared memory is inherited through fork)"""
+    frames = np.ndarray(shape, dtype=dtype, buffer=frames_shm.buf)
+    header = np.ndarray(4, dtype=np.int64, buffer=header_shm.buf)
+    result = np.ndarray(1, dtype=RESULT_DTYPE, buffer=results_shm.buf)[0]
+    last_id = 0
+    try:
+        while running.is_set():
+            if not new_frame.wait(timeout=0.5):
+                continue
+            with lock:
+                new_frame.clear()
+                slot = int(header[HEADER_LATEST_SLOT])
+                frame_id = int(header[HEADER_FRAME_ID])
+                timestamp = int(header[HEADER_TIMESTAMP])
+                if slot < 0 or frame_id == last_id:
+                    continue
+                header[HEADER_READING_SLOT] = slot
+            start = time.perf_counter()
+            try:
+                name, confidence = classify(frames[slot])
+            except Exception as e:
+                print(f"Vision worker error: {e}")
+                name, confidence = None, 0.0
+            latency = time.perf_counter() - start
+            last_id = frame_id
+            with lock:
+                header[HEADER_READING_SLOT] = -1
+                result['frame_id'] = frame_id
+                result['timestamp'] = timestamp
+                result['label'] = COLOR_LABELS.index(name) if name in COLOR_LABELS else -1
+                result['confidence'] = confidence
+                result['latency'] = latency
+    except KeyboardInterrupt:
+        pass
+    finally:
+        del frames, header, result
+
+
+class VisionWorker:
+    """Color classification in a child process, fed through shared memory
+
+    classify(frame) -> (color name, confidence) must be a picklable function
+    (e.g. a functools.partial of vision.detect_frame_color). The process is
+    forked, so start it before other threads are running and after any
+    lookup tables are loaded, which the child then shares.
+    """
+
+    def __init__(self, classify, frame_shape, dtype=np.uint8, slots=3):
+        if slots < 3:
+            raise ValueError("VisionWorker needs at least 3 frame slots")
+        self.classify = classify
+        self.frame_shape = tuple(frame_shape)
+        self.dtype = np.dtype(dtype)
+        self.slots = slots
+        self._ctx = multiprocessing.get_context("fork")
+        self._lock = self._ctx.Lock()
+        self._new_frame = self._ctx.Event()
+        self._running = self._ctx.Event()
+        self._process = None
+
+        ring_shape = (slots,) + self.frame_shape
+        self._frames_shm = shared_memory.SharedMemory(
+            create=True, size=int(np.prod(ring_shape)) * self.dtype.itemsize)
+        self._header_shm = shared_memory.SharedMemory(create=True, size=4 * 8)
+        self._results_shm = shared_memory.SharedMemory(create=True, size=RESULT_DTYPE.itemsize)
+        self._frames = np.ndarray(ring_shape, dtype=self.dtype, buffer=self._frames_shm.buf)
+        self._header = np.ndarray(4, dtype=np.int64, buffer=self._header_shm.buf)
+        self._result = np.ndarray(1, dtype=RESULT_DTYPE, buffer=self._results_shm.buf)[0]
+        self._header[:] = (-1, 0, 0, -1)
+        self._result['frame_id'] = 0
+        self._result['label'] = -1
+
+    def start(self):
+        """Fork the worker process"""
+        if self._process is not None:
+            return
+        self._running.set()
+        self._process = self._ctx.Process(
+            target=_worker_loop, name="vision-worker", daemon=True,
+            args=(self.classify, self._frames_shm, self._header_shm,
+                  self._results_shm, (self.slots,) + self.frame_shape, self.dtype,
+                  self._lock, self._new_frame, self._running))
+        self._process.start()
+
+    def stop(self):
+        """Stop the worker process and free the shared memory"""
+        self._running.clear()
+        if self._process is not None:
+            self._process.join(timeout=2)
+            if self._process.is_alive():
+                self._process.terminate()
+            self._process = None
+        del self._frames, self._header, self._result
+        for shm in (self._frames_shm, self._header_shm, self._results_shm):
+            shm.close()
+            shm.unlink()
+
+    def submit(self, frame, timestamp=0, frame_id=None):
+        """Copy a frame into a free slot and hand it to the worker (never blocks on the worker)"""
+        with self._lock:
+            busy = (int(self._header[HEADER_LATEST_SLOT]), int(self._header[HEADER_READING_SLOT]))
+            if frame_id is None:
+                frame_id = int(self._header[HEADER_FRAME_ID]) + 1
+        slot = next(i for i in range(self.slots) if i not in busy)
+        np.copyto(self._frames[slot], frame)
+        with self._lock:
+            self._header[HEADER_LATEST_SLOT] = slot
+            self._header[HEADER_FRAME_ID] = frame_id
+            self._header[HEADER_TIMESTAMP] = timestamp
+            self._new_frame.set()
+
+    def result(self):
+        """Latest result as (color name, confidence, frame id, timestamp, latency)
+
+        color name is None until the first frame has been classified.
+        """
+        with self._lock:
+            result = self._result.copy()
+        label = int(result['label'])
+        name = COLOR_LABELS[label] if label >= 0 else None
+        return (name, float(result['confidence']), int(result['frame_id']),
+                int(result['timestamp']), float(result['latency']))